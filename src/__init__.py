@@ -0,0 +1,47 @@
+'''WorldOnline 模拟器包
+
+顶层名称按需加载：`import src` 不会导入任何模拟器模块，
+首次访问 `src.Building` 等名称时才导入对应子模块。
+'''
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import importlib
+
+if TYPE_CHECKING:
+    from src.base import Timeline, Tool
+    from src.elevator import Building, Elevator, Passenger, Floor, Event
+    from src.scenario import Topology, load_scenario
+    from src.metrics import KpiTracker
+    from src.eta import EtaEstimator
+    from src.cache import ResultCache
+    from src.utils.translate import ElevatorTranslate
+
+# 名称 -> 所在模块
+_LAZY_ATTRS = {
+    'Timeline': 'src.base',
+    'Tool': 'src.base',
+    'Building': 'src.elevator',
+    'Elevator': 'src.elevator',
+    'Passenger': 'src.elevator',
+    'Floor': 'src.elevator',
+    'Event': 'src.elevator',
+    'Topology': 'src.scenario',
+    'load_scenario': 'src.scenario',
+    'KpiTracker': 'src.metrics',
+    'EtaEstimator': 'src.eta',
+    'ResultCache': 'src.cache',
+    'ElevatorTranslate': 'src.utils.translate',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # 只加载一次，之后走普通属性查找
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
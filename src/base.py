@@ -2,16 +2,21 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 
 class SimCoreBaseObject:
+    __slots__ = ()
     def __init__(self):
         self.timeline = Timeline()
 
 class Timeline:
     '''时间线类，管理时间，每个实例都有一个起始时间'''
+    __slots__ = ('last_time', 'current_time')
     def __init__(self, start_time:str='1970/01/01 00:00:00'):
         self.last_time = self.current_time = start_time
     def update_from(self, target:SimCoreBaseObject):
         self.last_time = self.current_time
         self.current_time = target.timeline.current_time
+    def update_from_time(self, new_time:str):
+        self.last_time = self.current_time
+        self.current_time = new_time
     def update(self, addsec:int=0, new_time:str=None):
         self.last_time = self.current_time
         if new_time:
@@ -32,6 +37,8 @@ class Tool:
         '''计算电梯在两个楼层之间运行的总高度，忽略0层'''
         if a == b:
             return 0
+        if hasattr(floor_range, 'height_between'):  # FloorTable：查累计高度
+            return floor_range.height_between(a, b)
         if a > b:
             a, b = b, a
         return sum(floor_range[f].height for f in Tool.myrange(a, b-1) if f != 0)
@@ -56,6 +63,10 @@ class Tool:
         # 计算时间差（秒数）
         return (dt2 - dt1).total_seconds()
     @staticmethod
+    def add_seconds(seconds: int, addsec: float) -> int:
+        '''整数秒时钟加上 `addsec` 秒，舍入规则与 `add_seconds_to_datetime` 相同（精确到微秒后截断到秒）'''
+        return seconds + round(addsec * 1_000_000) // 1_000_000
+    @staticmethod
     def add_seconds_to_datetime(datetime_str, addsec):
         # 示例使用
         #original_time = '1970/01/01 00:00:00'
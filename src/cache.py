@@ -0,0 +1,236 @@
+'''模拟结果缓存
+
+参数扫描和CI里经常重复跑完全相同的场景（同样的大楼、电梯、客流种子和调度策略）。
+`ResultCache` 以场景哈希、调度策略和 `ENGINE_VERSION` 为键，把统计结果存在磁盘上，
+可选地把规范事件日志（与 `src.replay` 相同的记录格式）gzip压缩后一并保存。
+命中时直接读缓存，不再运行 `Building.execute`。
+
+- 缓存总大小超过 `max_bytes` 时按最近使用时间（文件mtime，命中时刷新）淘汰最旧的条目
+- 每个条目是 `<键>.pickle`，带事件日志时另有 `<键>.events.gz`，都用原子替换写入
+- `hits` / `misses` 记录本实例的命中和未命中次数
+
+命令行::
+
+    python -m src.cache 场景1.json 场景2.json [--seed 1] [--events] [--max-mb 256]
+    python -m src.cache --clear
+'''
+from __future__ import annotations
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+from src.scenario import Topology, default_cache_dir, load_scenario
+
+class CachedResult(NamedTuple):
+    '''一次模拟的缓存结果'''
+    key: str
+    stats: Dict[str, Any]       # `Building.get_statistics` 的结果
+    events: int                 # 事件数
+    fingerprint: str            # 规范事件流指纹（与 `src.replay.fingerprint` 一致）
+    hit: bool                   # 是否来自缓存
+    events_path: Optional[str]  # 压缩事件日志，没有保存时为None
+
+    def iter_events(self) -> Iterator[list]:
+        '''逐条读取保存的规范事件记录'''
+        assert self.events_path, "该结果没有保存事件日志"
+        with gzip.open(self.events_path, 'rb') as f:
+            for line in f:
+                yield json.loads(line)
+
+class ResultCache:
+    '''按场景哈希缓存模拟结果，大小有上限（LRU淘汰）'''
+    def __init__(self,
+                 cache_dir: str = None,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 store_events: bool = False
+                 ):
+        assert max_bytes > 0, "缓存大小上限必须大于0"
+        self.cache_dir = cache_dir or default_cache_dir('results')
+        self.max_bytes = max_bytes
+        self.store_events = store_events
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f'ResultCache(dir={self.cache_dir!r}, hits={self.hits}, misses={self.misses})'
+
+    @staticmethod
+    def key(topology: Topology, method: str = None) -> str:
+        '''缓存键：场景哈希（已包含种子）+ 调度策略 + 引擎版本'''
+        from src.elevator import ENGINE_VERSION
+
+        assert topology.digest, "场景没有哈希，无法作为缓存键（请用 `compile_scenario`/`load_scenario` 创建）"
+        method = method or topology.strategy
+        raw = f'result-v{ENGINE_VERSION}\0{topology.digest}\0{method}'.encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def get(self, topology: Topology, method: str = None, events: bool = None) -> Optional[CachedResult]:
+        '''
+        查找缓存，未命中返回None。`events` 为True（默认取 `store_events`）时，
+        没有保存事件日志的条目也算未命中
+        '''
+        events = self.store_events if events is None else events
+        key = self.key(topology, method)
+        meta = self._path(key, '.pickle')
+        try:
+            with open(meta, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return None
+        log = self._path(key, '.events.gz')
+        has_log = os.path.exists(log)
+        if events and not has_log:
+            self.misses += 1
+            return None
+        # 刷新mtime作为最近使用时间
+        for path in (meta, log) if has_log else (meta,):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        self.hits += 1
+        return CachedResult(key, entry['stats'], entry['events'], entry['fingerprint'],
+                            True, log if has_log else None)
+
+    def run(self, topology: Topology, method: str = None, events: bool = None) -> CachedResult:
+        '''命中缓存时直接返回，否则运行模拟并写入缓存'''
+        cached = self.get(topology, method, events)
+        if cached is not None:
+            return cached
+        events = self.store_events if events is None else events
+        method = method or topology.strategy
+        building = topology.build()
+        result = building.execute(method)
+        stats = building.get_statistics(result)
+        return self.put(topology, method, stats, result, events)
+
+    def put(self, topology: Topology, method: str, stats: Dict[str, Any],
+            events_list: list, events: bool = None) -> CachedResult:
+        '''写入一次模拟结果（`events_list` 为 `execute` 返回的事件）'''
+        from src.replay import canonical, _encode
+
+        events = self.store_events if events is None else events
+        key = self.key(topology, method)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        h = hashlib.sha256()
+        log = self._path(key, '.events.gz') if events else None
+        if log:
+            tmp = f'{log}.{os.getpid()}.tmp'
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                for event in events_list:
+                    line = _encode(canonical(event)) + b'\n'
+                    h.update(line)
+                    f.write(line)
+            os.replace(tmp, log)
+        else:
+            for event in events_list:
+                h.update(_encode(canonical(event)) + b'\n')
+
+        entry = {'stats': stats, 'events': len(events_list), 'fingerprint': h.hexdigest(),
+                 'scenario': topology.digest, 'method': method}
+        meta = self._path(key, '.pickle')
+        tmp = f'{meta}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, meta)  # 元数据最后写，命中时日志一定完整
+        self.evict(keep=key)
+        return CachedResult(key, stats, entry['events'], entry['fingerprint'], False, log)
+
+    def _entries(self) -> Dict[str, list]:
+        '''键 -> [总字节数, 最近使用时间, 文件列表]'''
+        entries: Dict[str, list] = {}
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            e = entries.setdefault(name.split('.', 1)[0], [0, 0.0, []])
+            e[0] += st.st_size
+            e[1] = max(e[1], st.st_mtime)
+            e[2].append(path)
+        return entries
+
+    def size(self) -> int:
+        return sum(e[0] for e in self._entries().values())
+
+    def evict(self, keep: str = None) -> int:
+        '''按最近使用时间淘汰条目，直到总大小不超过上限；返回淘汰的条目数'''
+        entries = self._entries()
+        total = sum(e[0] for e in entries.values())
+        removed = 0
+        for key, (size, _, paths) in sorted(entries.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, paths in self._entries().values():
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        '''命中统计和当前缓存占用'''
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(entries),
+            'bytes': sum(e[0] for e in entries.values()),
+        }
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m src.cache', description='带结果缓存地运行场景')
+    parser.add_argument('scenarios', nargs='*')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--events', action='store_true', help='同时缓存压缩事件日志')
+    parser.add_argument('--max-mb', type=float, default=256)
+    parser.add_argument('--dir', help='缓存目录')
+    parser.add_argument('--clear', action='store_true', help='清空缓存')
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.dir, int(args.max_mb * 1024 * 1024), args.events)
+    if args.clear:
+        cache.clear()
+    for path in args.scenarios:
+        start = time.perf_counter()
+        result = cache.run(load_scenario(path, seed=args.seed))
+        ms = (time.perf_counter() - start) * 1000
+        print(f"{path}: {'命中' if result.hit else '未命中'} {ms:.1f}ms "
+              f"事件 {result.events} 指纹 {result.fingerprint[:16]}")
+    st = cache.stats()
+    print(f"命中 {st['hits']} / 未命中 {st['misses']}，缓存 {st['entries']} 条 {st['bytes'] / 1024:.1f}KB")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,45 @@
 from __future__ import annotations
-from typing import Literal, List, Dict, Any, Optional
+from typing import Literal, List, Dict, Any, Optional, Iterable, Callable
+from datetime import datetime, timedelta
 import heapq
+import math
 
 from src.base import *
+from src.floors import FloorTable
+from src.passengers import PassengerStore, WAITING, DONE, REJECTED, BALKED, RENEGED
+from src.queues import HallQueues
+from src.outages import OutageSchedule, FAULT
+from src.capacity import CapacityModel, CarLoad
+from src.utils.lazy import is_available
+
+# 引擎版本，调度结果可能变化时加一（重放日志和结果缓存会记录它）
+ENGINE_VERSION = 3
+
+class Subscription:
+    '''事件订阅：只关心部分事件类型/电梯/楼层，参数为None表示不限'''
+    __slots__ = ('event_types', 'eids', 'fids', 'callback', 'live')
+
+    def __init__(self,
+                 event_types: Optional[Iterable[str]]=None,
+                 elevators: Optional[Iterable[int]]=None,
+                 floors: Optional[Iterable[int]]=None,
+                 callback: Optional[Callable[[Dict[str, Any]], Any]]=None,
+                 live: bool=False
+                 ):
+        self.event_types = None if event_types is None else frozenset(event_types)
+        self.eids = None if elevators is None else frozenset(elevators)
+        self.fids = None if floors is None else frozenset(floors)
+        self.callback = callback
+        self.live = live
+
+    def match(self, event_type: str, elevator: Optional[Elevator]=None, floor: Optional[Floor]=None) -> bool:
+        if self.event_types is not None and event_type not in self.event_types:
+            return False
+        if self.eids is not None and (elevator is None or elevator.eid not in self.eids):
+            return False
+        if self.fids is not None and (floor is None or floor.fid not in self.fids):
+            return False
+        return True
 
 class Event(SimCoreBaseObject):
     '''事件基类'''
@@ -14,6 +51,115 @@ class Event(SimCoreBaseObject):
         self.relative_time = 0
         self.building = building
         self.timeline = Timeline(self.start_time)
+        self._start_dt = datetime.strptime(self.start_time, '%Y/%m/%d %H:%M:%S')
+        self._time_cache: Dict[int, str] = {}
+        self.subscriptions: List[Subscription] = []
+        self.keep_all = True    # 没有订阅时保留全部事件
+        self._live: List[Subscription] = []     # 事件产生时立即回调的订阅
+        self._types: Optional[frozenset] = None  # 所有订阅关心的事件类型之并，None表示不限
+        self.latest = 0         # 本次模拟中最晚的事件时间（秒），无论是否被订阅
+
+    def subscribe(self,
+                  callback: Optional[Callable[[Dict[str, Any]], Any]]=None,
+                  event_types: Optional[Iterable[str]]=None,
+                  elevators: Optional[Iterable[int]]=None,
+                  floors: Optional[Iterable[int]]=None,
+                  live: bool=False
+                  ) -> Subscription:
+        '''
+        订阅事件。一旦有订阅，模拟只生成至少被一个订阅需要的事件。
+        - `callback`: 模拟结束后按时间顺序对每个匹配事件调用
+        - `event_types`/`elevators`(eid)/`floors`(fid): 过滤条件，None表示不限
+        - `live`: 为True时在事件产生时立即回调（按引擎产生顺序，不保证时间有序）
+        '''
+        sub = Subscription(event_types, elevators, floors, callback, live)
+        self.subscriptions.append(sub)
+        self._refresh()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        if sub in self.subscriptions:
+            self.subscriptions.remove(sub)
+        self._refresh()
+
+    def _refresh(self):
+        self.keep_all = not self.subscriptions
+        self._live = [sub for sub in self.subscriptions if sub.live and sub.callback is not None]
+        types = set()
+        for sub in self.subscriptions:
+            if sub.event_types is None:
+                types = None
+                break
+            types |= sub.event_types
+        self._types = None if types is None else frozenset(types)
+
+    def wants(self, event_type: str, elevator: Optional[Elevator]=None, floor: Optional[Floor]=None) -> bool:
+        '''是否有订阅需要这个事件'''
+        if self.keep_all:
+            return True
+        if self._types is not None and event_type not in self._types:
+            return False
+        for sub in self.subscriptions:
+            if sub.match(event_type, elevator, floor):
+                return True
+        return False
+
+    def emit(self,
+             events: List[Dict[str, Any]],
+             event_type: str,
+             seconds: int,
+             elevator: Optional[Elevator]=None,
+             passenger: Optional[Passenger|int]=None,
+             floor: Optional[Floor]=None):
+        '''
+        有订阅需要时才创建事件字典并追加到 `events`。
+        `passenger` 可以传乘客存储中的下标，需要生成事件时才创建乘客视图
+        '''
+        if seconds > self.latest:
+            self.latest = seconds
+        if self.keep_all or self.wants(event_type, elevator, floor):
+            if isinstance(passenger, int):
+                passenger = self.building.passenger_store.get(passenger)
+            event = self.record(event_type, seconds, elevator, passenger, floor)
+            events.append(event)
+            for sub in self._live:
+                if sub.match(event_type, elevator, floor):
+                    sub.callback(event)
+
+    def dispatch(self, events: List[Dict[str, Any]]):
+        '''按顺序把事件交给带回调的订阅'''
+        subs = [sub for sub in self.subscriptions if sub.callback is not None and not sub.live]
+        if not subs:
+            return
+        for event in events:
+            for sub in subs:
+                if sub.match(event['event_type'], event['elevator'], event['floor']):
+                    sub.callback(event)
+
+    def time_str(self, seconds: int) -> str:
+        '''相对开始时间的秒数 -> 时间字符串（带缓存）'''
+        s = self._time_cache.get(seconds)
+        if s is None:
+            s = self._time_cache[seconds] = (self._start_dt + timedelta(seconds=seconds)).strftime('%Y/%m/%d %H:%M:%S')
+        return s
+
+    def record(self,
+               event_type: str,
+               seconds: int,
+               elevator: Optional[Elevator]=None,
+               passenger: Optional[Passenger]=None,
+               floor: Optional[Floor]=None
+               ) -> Dict[str, Any]:
+        '''按整数秒时钟创建事件字典，不需要解析时间字符串'''
+        return {
+            'event_type': event_type,
+            'time': self.time_str(seconds),
+            'building': self.building,
+            'elevator': elevator,
+            'passenger': passenger,
+            'floor': floor,
+            'relative_time': seconds
+        }
 
     def create_event(self,
                     event_type: Literal['start',
@@ -23,6 +169,8 @@ class Event(SimCoreBaseObject):
                                         'passenger_alight',
                                         'elevator_idle',
                                         'elevator_outweight',
+                                        'passenger_balk',
+                                        'passenger_renege',
                                         'end',
                                         'invalid']='elevator_idle',
                     elevator: Optional[Elevator]=None,
@@ -43,7 +191,9 @@ class Event(SimCoreBaseObject):
         return event_data
 
 class Passenger(SimCoreBaseObject):
-    '''乘客'''
+    '''乘客。大量乘客请直接用 `Building.add_passenger_record` 存入列式存储，不必创建对象'''
+    __slots__ = ('pid', 'weight', 'building', 'from_floor', 'to_floor', 'name',
+                 'appear_time', 'timeline', 'call_eid', 'on_board', 'is_processed')
     def __init__(self,
                  pid: int,
                  weight: int=70,
@@ -77,14 +227,13 @@ class Passenger(SimCoreBaseObject):
         return self.appear_time < other.appear_time
 
 class Floor(SimCoreBaseObject):
-    '''楼层，负数表示地下，注意忽略0层'''
+    '''楼层，负数表示地下，注意忽略0层。楼层不随时间变化，因此没有时间线'''
     def __init__(self, 
                  fid: int, 
                  height: float=3.0,
                  ):
         self.fid = fid
         self.height = height
-        self.timeline = Timeline()
     
     def __repr__(self):
         return f'Floor(fid={self.fid}, height={self.height})'
@@ -98,11 +247,15 @@ class Elevator(SimCoreBaseObject):
                  building: Building=None,
                  speed: float = 1.0,
                  height: float = 3.0,
-                 idle_time: float = 300.0
+                 idle_time: float = 300.0,
+                 max_persons: int = None,
+                 floor_area: float = None
                  ):
         self.eid = eid
         self.name = name if name else str(eid)
         self.max_weight = max_weight
+        self.max_persons = max_persons  # 额定人数，None表示只看载重
+        self.floor_area = floor_area    # 轿厢面积（平方米），None表示不按面积限制
         self.current_weight = 0
         self.passengers: List[Passenger] = []
         self.building = building
@@ -115,8 +268,17 @@ class Elevator(SimCoreBaseObject):
         self.is_idle = True
         self.direction = 1
         self.waiting_passengers: List[Passenger] = []  # 等待服务的乘客
+        # 人数上限只算一次；大楼换了容量模型或改了额定人数/面积后由 `Building.reset_cars` 重算
+        self._person_limit = (getattr(self.building, 'capacity', None) or CapacityModel()).person_limit(self)
+    
+    def person_limit(self) -> Optional[int]:
+        '''人数上限（额定人数与面积换算的较小值），None表示不限'''
+        return self._person_limit
     
     def add_passenger(self, passenger: Passenger) -> bool:
+        limit = self._person_limit
+        if limit is not None and len(self.passengers) >= limit:
+            return False
         if self.current_weight + passenger.weight <= self.max_weight:
             self.passengers.append(passenger)
             self.current_weight += passenger.weight
@@ -153,6 +315,20 @@ class Elevator(SimCoreBaseObject):
         """用于电梯排序"""
         return self.eid < other.eid
 
+class _DestTrip:
+    '''目的层派梯中已分配给电梯k、还没运行的一趟行程；电梯到达出发层（`board`）之前同桶乘客还能加入'''
+    __slots__ = ('k', 'origin', 'up', 'depart', 'load', 'stops', 'board', 'end', 'end_floor')
+
+    def __init__(self, k: int, origin: int, up: bool, depart: int, load: CarLoad):
+        self.k = k
+        self.origin = origin
+        self.up = up
+        self.depart = depart  # 第一位乘客呼梯、电梯动身的时刻
+        self.load = load
+        self.stops: Dict[int, List[int]] = {}  # 目的层 -> 乘客下标
+        self.board = self.end = depart
+        self.end_floor = origin
+
 class Building(SimCoreBaseObject):
     '''大楼，控制中心'''
     def __init__(self, 
@@ -166,24 +342,60 @@ class Building(SimCoreBaseObject):
         self.start_time = start_time
         self.timeline = Timeline(self.start_time)
         self.t = Tool()
-        self.floor_range = {f: Floor(f, normal_height) for f in self.t.myrange(floor_range[0].fid, floor_range[1].fid) if f != 0}
+        self.floor_range = FloorTable(floor_range[0].fid, floor_range[1].fid, normal_height)
         self.elevators = elevators
-        self.passengers: List[Passenger] = []
+        self.passenger_store = PassengerStore(self.start_time)
         self.bid = bid
         self.name = name
         self.eventman = Event(self.start_time, self)
         self.events_list: List[Dict[str, Any]] = []  # 存储所有事件
-        self.passenger_queue = []  # 乘客等待队列（最小堆）
+        # 每部电梯的运行状态（列式，下标与self.elevators一致），时间为相对开始时间的整数秒
+        self.car_index: Dict[int, int] = {}
+        self.car_clock: List[int] = []
+        self.car_last_active: List[int] = []
+        self.car_idle: List[bool] = []
+        self.car_load: List[CarLoad] = []  # 各电梯已上客的重量和人数（上限已缓存）
+        self.car_stops: List[tuple] = []   # 各电梯最近一趟行程的停靠 (到达时间, fid)
+        self.eta_min_cars = 24  # 电梯数不少于此值且装有NumPy时，用 `EtaEstimator` 批量估算ETA（更少时逐部计算更快）
+        self.eta_estimator = None
+        self.dd_window = 30  # 目的层派梯的分组时间窗（秒）
+        self._dd_chains: List[List[_DestTrip]] = []               # 目的层派梯各电梯按顺序待运行的行程
+        self._dd_pending: Dict[tuple[int, bool], List[_DestTrip]] = {}  # (出发层, 是否向上) -> 待运行的行程
+        self.hall_queues = HallQueues(self.floor_range)  # 排队模式的候梯队列及其配置
+        self.outages = OutageSchedule()  # 故障和维保停运计划
+        self.capacity = CapacityModel()  # 载重/人数/面积限制和停站时间，默认只限载重
         
         assert 0 not in self.floor_range, "楼层范围不能包含0层"
     
     def __repr__(self):
         return f'Building(name={self.name}, floors={len(self.floor_range)}, elevators={len(self.elevators)})'
     
+    @property
+    def passengers(self) -> PassengerStore:
+        """所有乘客，可当作列表使用"""
+        return self.passenger_store
+    
+    @passengers.setter
+    def passengers(self, passengers):
+        self.passenger_store = PassengerStore(self.start_time)
+        self.passenger_store.extend(passengers)
+    
     def add_passenger(self, passenger: Passenger):
         """添加乘客到系统"""
-        self.passengers.append(passenger)
-        heapq.heappush(self.passenger_queue, (passenger.appear_time, passenger))
+        self.passenger_store.append(passenger)
+    
+    def add_passenger_record(self,
+                             pid: int,
+                             from_floor: int,
+                             to_floor: int,
+                             appear: float|str = 0,
+                             weight: float = 70,
+                             call_eid: int = 0,
+                             name: str = None
+                             ) -> int:
+        """不创建 `Passenger` 对象，直接把乘客写入列式存储，返回其下标"""
+        assert any(e.eid == call_eid for e in self.elevators), f"eid {call_eid}不存在"
+        return self.passenger_store.add(pid, from_floor, to_floor, appear, weight, call_eid, name)
     
     def get_parking_floors_optimized(self, total_elevators: int, min_floor: int, max_floor: int) -> List[int]:
         """返回电梯待命楼层列表"""
@@ -191,7 +403,7 @@ class Building(SimCoreBaseObject):
             return [(min_floor + max_floor) // 2]
         
         parking_floors = []
-        parking_floors.append(1)  # 第一部电梯在1楼
+        parking_floors.append(1 if min_floor <= 1 <= max_floor else min_floor)  # 第一部电梯在1楼（分区没有1楼时在最低层）
         
         if total_elevators == 2:
             valid_floors = [f for f in range(min_floor, max_floor + 1) if f != 0]
@@ -208,184 +420,514 @@ class Building(SimCoreBaseObject):
         return sorted(parking_floors)
     
     def elevator_initpark(self) -> List[Dict[str, Any]]:
-        """初始化电梯位置，返回事件列表"""
+        """初始化电梯位置，返回事件列表（需先调用 `reset_cars`）"""
         events = []
-        floor_keys = list(self.floor_range.keys())
         parking_floors = self.get_parking_floors_optimized(
-            len(self.elevators), floor_keys[0], floor_keys[-1]
+            len(self.elevators), self.floor_range.lowest, self.floor_range.highest
         )
         
-        for elevator, current_floor in zip(self.elevators, parking_floors):
+        for k, (elevator, current_floor) in enumerate(zip(self.elevators, parking_floors)):
             elevator.current_floor = current_floor
-            events.append(self.eventman.create_event(
-                'elevator_arrive', 
-                elevator=elevator, 
-                floor=self.floor_range[current_floor],
-                time_host=elevator
-            ))
-            events.append(self.eventman.create_event(
-                'elevator_idle',
-                elevator=elevator,
-                time_host=elevator
-            ))
+            self.eventman.emit(events, 'elevator_arrive', self.car_clock[k], elevator,
+                               floor=self.floor_range[current_floor])
+            self.eventman.emit(events, 'elevator_idle', self.car_clock[k], elevator)
+        if self.eta_estimator is not None:
+            self.eta_estimator.refresh()
         
         return events
     
+    def reset_cars(self):
+        """从电梯对象读取初始状态，建立列式运行状态"""
+        self.car_index = {e.eid: k for k, e in enumerate(self.elevators)}
+        self.car_clock = [int(Tool.time_difference_seconds(self.start_time, e.timeline.current_time)) for e in self.elevators]
+        self.car_last_active = [int(Tool.time_difference_seconds(self.start_time, e.last_active_time)) for e in self.elevators]
+        self.car_idle = [e.is_idle for e in self.elevators]
+        self.car_load = []
+        for e in self.elevators:
+            load = self.capacity.new_load(e)
+            load.weight, load.count = e.current_weight, len(e.passengers)
+            self.car_load.append(load)
+            e._person_limit = load.max_persons
+        self.car_stops = [()] * len(self.elevators)
+        self.eta_estimator = None
+        if len(self.elevators) >= self.eta_min_cars and is_available('numpy'):
+            from src.eta import EtaEstimator
+            self.eta_estimator = EtaEstimator(self)
+    
+    def sync_cars(self):
+        """把列式运行状态写回电梯对象"""
+        for k, elevator in enumerate(self.elevators):
+            elevator.timeline.update_from_time(self.eventman.time_str(self.car_clock[k]))
+            elevator.last_active_time = self.eventman.time_str(self.car_last_active[k])
+            elevator.is_idle = self.car_idle[k]
+    
+    def _car_moved(self, k: int):
+        """电梯k的位置或时钟变了：同步到批量ETA估算器"""
+        if self.eta_estimator is not None:
+            self.eta_estimator.update(k)
+    
     def move_elevator_to_floor(self, elevator: Elevator, target_floor: int, 
-                              current_time: str) -> List[Dict[str, Any]]:
-        """移动电梯到指定楼层，返回事件列表"""
-        events = []
-        
-        # 计算移动时间
-        travel_time = self.t.total_height(
-            elevator.current_floor,
-            target_floor,
-            self.floor_range
-        ) / elevator.speed
-        
-        # 更新电梯时间线
-        elevator.timeline.update_from_time(current_time)
-        elevator.timeline.update(travel_time)
-        
-        # 更新电梯位置
+                              current_time: int) -> List[Dict[str, Any]]:
+        """从 `current_time`（秒）起移动电梯到指定楼层，返回事件列表"""
+        k = self.car_index[elevator.eid]
+        travel_time = self.floor_range.height_between(elevator.current_floor, target_floor) / elevator.speed
+        self.car_clock[k] = Tool.add_seconds(current_time, travel_time)
         elevator.current_floor = target_floor
-        
-        # 创建到达事件
-        events.append(self.eventman.create_event(
-            'elevator_arrive',
-            elevator=elevator,
-            floor=self.floor_range[target_floor],
-            time_host=elevator
-        ))
-        
+        self._car_moved(k)
+        events = []
+        self.eventman.emit(events, 'elevator_arrive', self.car_clock[k], elevator,
+                           floor=self.floor_range[target_floor])
         return events
     
-    def process_passenger_fcfs(self, passenger: Passenger) -> List[Dict[str, Any]]:
-        """按FCFS策略处理单个乘客，返回事件列表"""
+    def process_passenger_fcfs(self, i: int) -> List[Dict[str, Any]]:
+        """按FCFS策略处理下标为 `i` 的乘客，返回事件列表"""
         events = []
+        store = self.passenger_store
         
         # 找到指定电梯
-        elevator = next((e for e in self.elevators if e.eid == passenger.call_eid), None)
-        if not elevator:
+        k = self.car_index.get(store.call_eid[i])
+        if k is None:
             return events
-        
-        # 更新乘客时间线到出现时间
-        passenger.timeline.update_from_time(passenger.appear_time)
+        appear = int(store.appear[i])
+        depart = appear
+        if self.outages.outages:
+            depart = self.outages.next_free(store.call_eid[i], appear)
+            if depart > appear:
+                # 呼叫的电梯停运中，本次改派给ETA最小的电梯（不改乘客数据，重跑结果不变）
+                k = self.fastest_cars(store.from_floor[i], appear)[0][1]
+                depart = self.outages.next_free(self.elevators[k].eid, appear)
+        elevator = self.elevators[k]
+        floor_range = self.floor_range
+        emit = self.eventman.emit
         
         # 检查电梯空闲时间
-        diff = Tool.time_difference_seconds(elevator.last_active_time, passenger.appear_time)
-        if diff >= elevator.idle_time and elevator.is_idle:
-            elevator.timeline.update_from_time(passenger.appear_time)
-            elevator.timeline.update(elevator.idle_time)
-            events.append(self.eventman.create_event(
-                'elevator_idle',
-                elevator=elevator,
-                time_host=elevator
-            ))
-            elevator.is_idle = False
+        if appear - self.car_last_active[k] >= elevator.idle_time and self.car_idle[k]:
+            self.car_clock[k] = Tool.add_seconds(appear, elevator.idle_time)
+            self._car_moved(k)
+            emit(events, 'elevator_idle', self.car_clock[k], elevator)
+            self.car_idle[k] = False
         
         # 乘客呼叫电梯事件
-        events.append(self.eventman.create_event(
-            'call_elevator',
-            elevator=elevator,
-            passenger=passenger,
-            floor=self.floor_range[passenger.from_floor],
-            time_host=passenger
-        ))
-        
-        # 检查电梯是否超载（预检查）
-        if not elevator.add_passenger(passenger):
-            # 超重事件
-            events.append(self.eventman.create_event(
-                'elevator_outweight',
-                elevator=elevator,
-                passenger=passenger,
-                time_host=elevator
-            ))
-            passenger.is_processed = True
+        from_floor, to_floor = store.from_floor[i], store.to_floor[i]
+        emit(events, 'call_elevator', appear, elevator, i, floor_range[from_floor])
+        
+        # 检查电梯是否超载（载重、人数）
+        load = self.car_load[k]
+        if not load.fits(store.weight[i]):
+            emit(events, 'elevator_outweight', self.car_clock[k], elevator, i)
+            store.status[i] = REJECTED
             return events
+        # 预检查视为一次空载上下客
+        self.car_last_active[k] = appear
+        self.car_idle[k] = True
         
-        # 移除预检查增加的重量
-        elevator.remove_passenger(passenger)
-        
-        # 如果电梯不在乘客所在楼层，需要移动
-        if elevator.current_floor != passenger.from_floor:
-            move_events = self.move_elevator_to_floor(
-                elevator, passenger.from_floor, passenger.appear_time
-            )
-            events.extend(move_events)
+        # 如果电梯不在乘客所在楼层，需要移动（停运中的电梯恢复后才出发）
+        if elevator.current_floor != from_floor:
+            events.extend(self.move_elevator_to_floor(elevator, from_floor, depart))
+        elif depart > appear:
+            self.car_clock[k] = max(self.car_clock[k], depart)
+            self._car_moved(k)
         
         # 乘客上电梯
-        passenger.timeline.update_from(elevator)
-        elevator.add_passenger(passenger)
-        events.append(self.eventman.create_event(
-            'passenger_board',
-            elevator=elevator,
-            passenger=passenger,
-            floor=self.floor_range[passenger.from_floor],
-            time_host=passenger
-        ))
-        
-        # 移动电梯到目标楼层
-        move_events = self.move_elevator_to_floor(
-            elevator, passenger.to_floor, passenger.timeline.current_time
-        )
-        events.extend(move_events)
-        
-        # 乘客下电梯
-        events.append(self.eventman.create_event(
-            'passenger_alight',
-            elevator=elevator,
-            passenger=passenger,
-            floor=self.floor_range[passenger.to_floor],
-            time_host=elevator
-        ))
-        elevator.remove_passenger(passenger)
-        
-        passenger.is_processed = True
+        board = self.car_clock[k]
+        self.car_idle[k] = False
+        emit(events, 'passenger_board', board, elevator, i, floor_range[from_floor])
+        load.add(store.weight[i])
+        
+        # 移动电梯到目标楼层，乘客下电梯
+        events.extend(self.move_elevator_to_floor(elevator, to_floor, self.after_dwell(board, 1, 0)))
+        alight = self.car_clock[k]
+        emit(events, 'passenger_alight', alight, elevator, i, floor_range[to_floor])
+        load.remove(store.weight[i])
+        self.car_clock[k] = self.after_dwell(alight, 0, 1)
+        self._car_moved(k)
+        self.car_stops[k] = ((board, from_floor), (alight, to_floor))
+        self.car_last_active[k] = board
+        self.car_idle[k] = True
+        
+        store.status[i] = DONE
+        store.board_time[i] = board
+        store.alight_time[i] = alight
+        return events
+    
+    def after_dwell(self, t: int, boarding: int, alighting: int) -> int:
+        """在 `t` 时刻停站、有 `boarding` 人上 `alighting` 人下，返回关门可以出发的时间"""
+        dwell = self.capacity.dwell(boarding, alighting)
+        return Tool.add_seconds(t, dwell) if dwell else t
+    
+    def car_ready(self, k: int, ready: int) -> int:
+        """电梯k在 `ready` 之后最早何时能出发（忙完且不在停运中）"""
+        t = max(self.car_clock[k], ready)
+        if self.outages.outages:
+            t = self.outages.next_free(self.elevators[k].eid, t)
+        return t
+    
+    def car_eta(self, k: int, floor: int, ready: int) -> int:
+        """电梯k在 `ready` 之后最早何时能到达 `floor`（秒）"""
+        elevator = self.elevators[k]
+        travel_time = self.floor_range.height_between(elevator.current_floor, floor) / elevator.speed
+        return Tool.add_seconds(self.car_ready(k, ready), travel_time)
+    
+    def fastest_cars(self, floor: int, ready: int) -> List[tuple[int, int]]:
+        """各电梯的 (到达 `floor` 的ETA, 下标)，按ETA升序，并列时下标小的在前"""
+        est = self.eta_estimator
+        if est is None:
+            return sorted((self.car_eta(k, floor, ready), k) for k in range(len(self.elevators)))
+        return sorted(zip(est.matrix((floor,), ready)[0].tolist(), range(len(self.elevators))))
+    
+    def run_trip(self, k: int, from_floor: int, stops: List[tuple[int, List[int]]],
+                 depart: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        电梯k在 `from_floor` 接上所有乘客，按顺序停靠 `stops`（(楼层, 乘客下标列表)），返回事件列表。
+        派梯时应已用 `car_load[k].fits` 检查并 `add` 这些乘客，下客时在这里减掉。
+        `depart` 为电梯动身去接人的时刻，默认等所有乘客都呼梯后才出发；上客时间总是不早于最后一位乘客呼梯
+        """
+        events = []
+        elevator = self.elevators[k]
+        store = self.passenger_store
+        floor_range = self.floor_range
+        emit = self.eventman.emit
+        ready = max(int(store.appear[i]) for _, group in stops for i in group)
+        if depart is None:
+            depart = ready
+        
+        # 电梯空闲超过idle_time才出发的，补一个空闲事件
+        if self.car_idle[k]:
+            idle_at = Tool.add_seconds(self.car_last_active[k], elevator.idle_time)
+            if idle_at <= depart:
+                emit(events, 'elevator_idle', idle_at, elevator)
+            self.car_idle[k] = False
+        
+        if elevator.current_floor != from_floor:
+            events.extend(self.move_elevator_to_floor(elevator, from_floor, self.car_ready(k, depart)))
+        board = self.car_ready(k, ready)
+        boarding = 0
+        for _, group in stops:
+            for i in group:
+                emit(events, 'passenger_board', board, elevator, i, floor_range[from_floor])
+                store.board_time[i] = board
+            boarding += len(group)
+        
+        load = self.car_load[k]
+        plan = [(board, from_floor)]
+        t = self.after_dwell(board, boarding, 0)
+        for to_floor, group in stops:
+            events.extend(self.move_elevator_to_floor(elevator, to_floor, t))
+            t = self.car_clock[k]
+            plan.append((t, to_floor))
+            for i in group:
+                emit(events, 'passenger_alight', t, elevator, i, floor_range[to_floor])
+                store.status[i] = DONE
+                store.alight_time[i] = t
+                load.remove(store.weight[i])
+            t = self.after_dwell(t, 0, len(group))
+        
+        self.car_clock[k] = t
+        self._car_moved(k)
+        self.car_stops[k] = plan
+        self.car_last_active[k] = t
+        self.car_idle[k] = True
+        return events
+    
+    def process_batch_destination(self, batch: List[int]) -> List[Dict[str, Any]]:
+        """
+        目的层派梯：按呼梯先后处理一个时间窗内的乘客。每位乘客先并进同一(出发层, 方向)
+        还没接人的行程（优先已停靠其目的层的那趟），装不下才新开一趟，
+        交给最早能到的电梯接在它已分配的行程之后，因此一个桶只在载重/人数装不下时才拆给多部电梯。
+        先运行上客时间早于本批第一位乘客的行程，返回事件列表（需先 `reset_dest`，剩下的由 `flush_destination` 运行）
+        """
+        store = self.passenger_store
+        emit = self.eventman.emit
+        max_capacity = max(e.max_weight for e in self.elevators)
+        # 本批之后到达的乘客赶不上这些行程了，可以运行
+        events = self.flush_destination(int(store.appear[batch[0]]))
+        
+        # 整批只算一次各呼梯对各电梯的ETA矩阵；有待运行行程的电梯从其最后一趟结束时逐部推算
+        table = None
+        if self.eta_estimator is not None:
+            table = self.eta_estimator.matrix([store.from_floor[i] for i in batch],
+                                              [int(store.appear[i]) for i in batch]).tolist()
+        chains, pending = self._dd_chains, self._dd_pending
+        for row, i in enumerate(batch):
+            appear, w = int(store.appear[i]), store.weight[i]
+            from_floor, dst = store.from_floor[i], store.to_floor[i]
+            if w > max_capacity:
+                emit(events, 'call_elevator', appear, passenger=i, floor=self.floor_range[from_floor])
+                emit(events, 'elevator_outweight', appear, self.elevators[0], i)
+                store.status[i] = REJECTED
+                continue
+            
+            # 电梯到达出发层之前还能加人的同桶行程，先选已停靠目的层的，再选上客早的。
+            # 乘客按呼梯先后处理，已过上客时间或有人装不下的行程不再加人
+            key = (from_floor, dst > from_floor)
+            joinable = [trip for trip in pending.get(key, ()) if trip.board >= appear and trip.load.fits(w)]
+            pending[key] = joinable
+            if joinable:
+                trip = min(joinable, key=lambda trip: (dst not in trip.stops, trip.board))
+            else:
+                etas = []
+                for k, elevator in enumerate(self.elevators):
+                    if elevator.max_weight < w:
+                        continue
+                    if chains[k] or table is None:
+                        eta = self._chain_eta(k, from_floor, appear)
+                    else:
+                        eta = table[row][k]
+                    etas.append((eta, k))
+                k = min(etas)[1]
+                trip = _DestTrip(k, from_floor, key[1], appear, self.capacity.new_load(self.elevators[k]))
+                chains[k].append(trip)
+                pending.setdefault(key, []).append(trip)
+            trip.stops.setdefault(dst, []).append(i)
+            trip.load.add(w)
+            self._plan_chain(trip.k, trip)
+        return events
+    
+    def reset_dest(self):
+        """清空目的层派梯已分配、待运行的行程"""
+        self._dd_chains = [[] for _ in self.elevators]
+        self._dd_pending = {}
+    
+    def flush_destination(self, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """运行上客时间早于 `before` 的待运行行程（None表示全部），返回事件列表"""
+        events = []
+        for k, chain in enumerate(self._dd_chains):
+            n = 0
+            while n < len(chain) and (before is None or chain[n].board < before):
+                trip = chain[n]
+                trips = self._dd_pending[(trip.origin, trip.up)]
+                if trip in trips:
+                    trips.remove(trip)
+                load = self.car_load[k]
+                for group in trip.stops.values():
+                    for i in group:
+                        load.add(self.passenger_store.weight[i])
+                events.extend(self._dispatch_trip(k, trip.origin, sorted(trip.stops.items(), reverse=not trip.up),
+                                                  trip.depart))
+                assert self.car_stops[k][0][0] == trip.board, "行程上客时间与推算不一致"
+                n += 1
+            del chain[:n]
+        return events
+    
+    def _chain_eta(self, k: int, floor: int, ready: int) -> int:
+        """电梯k跑完已分配的行程后，在 `ready` 之后最早何时能到达 `floor`（秒）"""
+        chain = self._dd_chains[k]
+        if not chain:
+            return self.car_eta(k, floor, ready)
+        elevator = self.elevators[k]
+        t = max(chain[-1].end, ready)
+        if self.outages.outages:
+            t = self.outages.next_free(elevator.eid, t)
+        return Tool.add_seconds(t, self.floor_range.height_between(chain[-1].end_floor, floor) / elevator.speed)
+    
+    def _plan_chain(self, k: int, changed: _DestTrip):
+        """
+        行程 `changed` 加了人：按 `run_trip` 的规则重新推算电梯k从它起各待运行行程的上客、结束时间和结束楼层，
+        某趟结束时间和楼层不变时后面的行程也不变
+        """
+        chain = self._dd_chains[k]
+        elevator = self.elevators[k]
+        outages = self.outages
+        height_between = self.floor_range.height_between
+        start = len(chain) - 1
+        while chain[start] is not changed:
+            start -= 1
+        if start:
+            t, floor = chain[start - 1].end, chain[start - 1].end_floor
+        else:
+            t, floor = self.car_clock[k], elevator.current_floor
+        for n in range(start, len(chain)):
+            trip = chain[n]
+            t = max(t, trip.depart)
+            if outages.outages:
+                t = outages.next_free(elevator.eid, t)
+            if floor != trip.origin:
+                t = Tool.add_seconds(t, height_between(floor, trip.origin) / elevator.speed)
+                if outages.outages:
+                    t = outages.next_free(elevator.eid, t)
+            trip.board = t
+            t = self.after_dwell(t, trip.load.count, 0)
+            floor = trip.origin
+            for dst in sorted(trip.stops, reverse=not trip.up):
+                t = Tool.add_seconds(t, height_between(floor, dst) / elevator.speed)
+                t = self.after_dwell(t, 0, len(trip.stops[dst]))
+                floor = dst
+            if (trip.end, trip.end_floor) == (t, floor):
+                break
+            trip.end, trip.end_floor = t, floor
+    
+    def _dispatch_trip(self, k: int, from_floor: int, stops: List[tuple[int, List[int]]],
+                       depart: Optional[int] = None) -> List[Dict[str, Any]]:
+        """为一趟行程的乘客生成呼梯事件（告知分配到的电梯）并运行该行程"""
+        events = []
+        store = self.passenger_store
+        elevator = self.elevators[k]
+        for _, group in stops:
+            for i in group:
+                self.eventman.emit(events, 'call_elevator', int(store.appear[i]), elevator,
+                                   i, self.floor_range[from_floor])
+        events.extend(self.run_trip(k, from_floor, stops, depart))
         return events
     
-    def execute(self, method: Literal["FCFS", "SSTF", "LOOK"] = "FCFS") -> List[Dict[str, Any]]:
-        """执行电梯调度，返回所有事件列表"""
+    def run_destination(self) -> List[Dict[str, Any]]:
+        """按 `dd_window` 把乘客切成时间窗批次，逐批做目的层派梯，最后运行剩下的行程"""
+        events = []
+        store = self.passenger_store
+        self.reset_dest()
+        batch: List[int] = []
+        close = 0
+        for i in store.order_by_appear():
+            if batch and store.appear[i] >= close:
+                events.extend(self.process_batch_destination(batch))
+                batch = []
+            if not batch:
+                close = store.appear[i] + self.dd_window
+            batch.append(i)
+        if batch:
+            events.extend(self.process_batch_destination(batch))
+        events.extend(self.flush_destination())
+        return events
+    
+    def run_queue(self) -> List[Dict[str, Any]]:
+        """
+        排队模式：乘客在出发层按上下行排队，空闲的电梯去接队首到达最早的队列，
+        按先来后到装到满载为止，送完再接下一批。拥挤上限和耐心见 `hall_queues`
+        """
+        events = []
+        store = self.passenger_store
+        hq = self.hall_queues
+        hq.reset(store.appear)
+        emit = self.eventman.emit
+        floor_range = self.floor_range
+        heaviest = max(e.max_weight for e in self.elevators)
+        order = store.order_by_appear()
+        ai = 0
+        free = [(self.car_clock[k], k) for k in range(len(self.elevators))]
+        heapq.heapify(free)
+        
+        def flush_reneged():
+            for i, fid in hq.reneged:
+                emit(events, 'passenger_renege', Tool.add_seconds(int(store.appear[i]), hq.patience),
+                     passenger=i, floor=floor_range[fid])
+                store.status[i] = RENEGED
+            hq.reneged.clear()
+        
+        while free:
+            t_car, k = free[0]
+            # 先处理在这部电梯空出来之前到达的乘客
+            if ai < len(order) and store.appear[order[ai]] <= t_car:
+                i = order[ai]
+                ai += 1
+                t = int(store.appear[i])
+                fid, to_floor = store.from_floor[i], store.to_floor[i]
+                emit(events, 'call_elevator', t, passenger=i, floor=floor_range[fid])
+                if store.weight[i] > heaviest:
+                    emit(events, 'elevator_outweight', t, self.elevators[0], i)
+                    store.status[i] = REJECTED
+                elif not hq.join(i, fid, to_floor >= fid, t):
+                    emit(events, 'passenger_balk', t, passenger=i, floor=floor_range[fid])
+                    store.status[i] = BALKED
+                flush_reneged()
+                continue
+            
+            heapq.heappop(free)
+            elevator = self.elevators[k]
+            if self.outages.outages:
+                t_free = self.outages.next_free(elevator.eid, t_car)
+                if t_free > t_car:
+                    # 停运中，恢复后再参与派梯；候梯乘客留在队列里由其他电梯接
+                    heapq.heappush(free, (t_free, k))
+                    continue
+            # 只找这部电梯载得动的乘客：载不动的留给更大的电梯，不占住这部电梯
+            target = hq.oldest(t_car, store.weight, self.car_load[k].max_weight)
+            flush_reneged()
+            if target is None:
+                # 没有能接的乘客：等下一位乘客到达再参与派梯，没有了就不再出动
+                # （其他电梯接走乘客不会给这部电梯带来新的可接乘客）
+                if ai < len(order):
+                    heapq.heappush(free, (max(math.ceil(store.appear[order[ai]]), t_car), k))
+                continue
+            fid, up = target
+            
+            self.car_clock[k] = max(self.car_clock[k], t_car)
+            self._car_moved(k)
+            hq.expire(fid, up, self.car_eta(k, fid, t_car))
+            flush_reneged()
+            taken = hq.take(fid, up, self.car_load[k], store.weight)
+            if not taken:
+                # 到达前乘客都走了，白跑一趟
+                events.extend(self.move_elevator_to_floor(elevator, fid, t_car))
+            else:
+                stops: Dict[int, List[int]] = {}
+                for i in taken:
+                    stops.setdefault(store.to_floor[i], []).append(i)
+                events.extend(self.run_trip(k, fid, sorted(stops.items(), reverse=not up)))
+            heapq.heappush(free, (self.car_clock[k], k))
+        return events
+    
+    def outage_events(self) -> List[Dict[str, Any]]:
+        """
+        停运计划对应的定时事件：每段合并后的停运时间段（`outages.windows`）一次停运开始和一次恢复服务。
+        开始事件的类型取开启这段时间的停运，同时开始的有故障时算故障
+        """
+        events = []
+        opened: Dict[tuple[int, int], str] = {}  # (eid, 开始时间) -> 停运类型
+        for o in self.outages.outages:
+            if opened.get((o.eid, o.start)) != FAULT:
+                opened[(o.eid, o.start)] = o.kind
+        for eid in sorted({o.eid for o in self.outages.outages}):
+            k = self.car_index.get(eid)
+            if k is None:
+                continue
+            elevator = self.elevators[k]
+            for start, end in zip(*self.outages.windows(eid)):
+                kind = 'elevator_fault' if opened[(eid, start)] == FAULT else 'elevator_maintenance'
+                self.eventman.emit(events, kind, start, elevator)
+                self.eventman.emit(events, 'elevator_restore', end, elevator)
+        return events
+    
+    def execute(self, method: Literal["FCFS", "DEST", "QUEUE", "SSTF", "LOOK"] = "FCFS") -> List[Dict[str, Any]]:
+        """
+        执行电梯调度，返回所有事件列表；有订阅时只返回被订阅的事件
+        - FCFS: 先到先得，乘客使用自己呼叫的电梯(call_eid)
+        - DEST: 目的层派梯，按 `dd_window` 时间窗分组，由系统分配电梯
+        - QUEUE: 各层排队，电梯按先来后到接人，可模拟拥挤和放弃（见 `hall_queues`）
+        三种方法都会避开 `outages` 中的停运时段
+        """
         self.method = method
+        eventman = self.eventman
         all_events = []
         
         # 开始事件
-        all_events.append(self.eventman.create_event('start', time_host=self))
+        start = int(Tool.time_difference_seconds(self.start_time, self.timeline.current_time))
+        eventman.latest = start
+        eventman.emit(all_events, 'start', start)
         
         # 电梯初始化待命
-        init_events = self.elevator_initpark()
-        all_events.extend(init_events)
+        self.reset_cars()
+        all_events.extend(self.elevator_initpark())
+        all_events.extend(self.outage_events())
+        self.passenger_store.reset()
         
-        # 按出现时间排序乘客
-        sorted_passengers = sorted(
-            self.passengers,
-            key=lambda p: Tool.time_difference_seconds(self.start_time, p.appear_time)
-        )
-        
-        # 根据调度方法处理乘客
+        # 根据调度方法处理乘客（按出现时间顺序）
         if method == "FCFS":
-            for passenger in sorted_passengers:
-                passenger_events = self.process_passenger_fcfs(passenger)
-                all_events.extend(passenger_events)
+            for i in self.passenger_store.order_by_appear():
+                all_events.extend(self.process_passenger_fcfs(i))
+        elif method == "DEST":
+            all_events.extend(self.run_destination())
+        elif method == "QUEUE":
+            all_events.extend(self.run_queue())
+        self.sync_cars()
+        self.passenger_store.sync_objects()
         
         # 按时间排序所有事件
-        all_events.sort(key=lambda e: Tool.time_difference_seconds(
-            self.start_time, e['time']
-        ))
-        
-        # 更新相对时间
-        for event in all_events:
-            event['relative_time'] = Tool.time_difference_seconds(
-                self.start_time, event['time']
-            )
+        all_events.sort(key=lambda e: e['relative_time'])
         
         # 结束事件
-        if all_events:
-            last_time = all_events[-1]['time']
-            self.timeline.update_from_time(last_time)
-            all_events.append(self.eventman.create_event('end', time_host=self))
+        self.timeline.update_from_time(eventman.time_str(eventman.latest))
+        eventman.emit(all_events, 'end', eventman.latest)
         
+        eventman.dispatch(all_events)
         return all_events
     
     def get_statistics(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -393,7 +935,7 @@ class Building(SimCoreBaseObject):
         stats = {
             'total_passengers': len(self.passengers),
             'total_events': len(events),
-            'processed_passengers': sum(1 for p in self.passengers if p.is_processed),
+            'processed_passengers': len(self.passengers) - self.passenger_store.count(WAITING),
             'elevator_utilization': {},
             'event_types': {}
         }
@@ -421,4 +963,16 @@ class Building(SimCoreBaseObject):
                 'current_floor': elevator.current_floor
             }
         
+        # 有停运计划时，分正常/降级时段统计候梯时间
+        if self.outages:
+            downtime: Dict[int, int] = {}
+            for eid in {o.eid for o in self.outages}:
+                starts, ends = self.outages.windows(eid)
+                downtime[eid] = sum(b - a for a, b in zip(starts, ends))
+            stats['outages'] = {
+                'count': len(self.outages),
+                'downtime': downtime,
+                'wait': self.outages.wait_report(self.passenger_store),
+            }
+        
         return stats
\ No newline at end of file
@@ -0,0 +1,121 @@
+'''批量ETA估算：一次NumPy运算得到“呼梯 × 电梯”的到达时间矩阵
+
+派梯时要为每个待处理的呼梯估计每部电梯多久能到。逐个呼梯循环 `self.elevators`
+在呼梯多、电梯多时会成为热点；这里电梯位置和时钟由引擎在电梯移动时就地更新（`update`），
+派梯时用广播一次算出整个代价矩阵。需要NumPy（首次使用时才导入）。
+
+估算模型与引擎一致（`Building.car_eta`）：引擎按整趟行程派梯，行程派出后不会中途插入新的停靠，
+电梯跑完这一趟（途中各停靠和停站时间都算在内）后停在最后一站 `current_floor`，时刻为 `car_clock`。
+电梯的方向和待停楼层因此都已体现在这两个量里：
+- 最早出发时间：`car_clock` 与呼梯时刻取较晚者，落在停运时段内时推迟到恢复服务
+- 运行时间：楼层表累计高度之差 / 速度，按 `Tool.add_seconds` 的规则舍入到整数秒
+结果与 `car_eta` 逐项相等。本趟还没到的停靠楼层和方向见 `trip_stops`。
+'''
+from __future__ import annotations
+from typing import Sequence
+
+from src.utils.lazy import require
+
+def _np():
+    return require('numpy', '批量ETA估算')
+
+class EtaEstimator:
+    '''基于 `Building` 引擎状态（`car_clock`、`current_floor`、`outages`）的批量ETA估算器'''
+    def __init__(self, building):
+        np = _np()
+        self.building = building
+        elevators = building.elevators
+        # 不随模拟变化的部分只整理一次；楼层高度、电梯或停运计划改了要重新创建
+        self.cum = np.array(building.floor_range.cum_heights, dtype=np.float64)
+        self.speed = np.array([e.speed for e in elevators], dtype=np.float64)
+        self.down = []  # 有停运计划的电梯：(下标, 开始数组, 结束数组)
+        outages = building.outages
+        if outages.outages:
+            for k, e in enumerate(elevators):
+                starts, ends = outages.windows(e.eid)
+                if starts:
+                    self.down.append((k, np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)))
+        self.refresh()
+
+    def floor_index(self, fids):
+        '''fid数组 -> 楼层表下标数组（跳过0层）'''
+        np = _np()
+        table = self.building.floor_range
+        f = np.asarray(fids, dtype=np.int64)
+        assert not ((f == 0) | (f < table.lowest) | (f > table.highest)).any(), "楼层不在大楼范围内"
+        return f - table.lowest - ((f > 0) & (table.lowest < 0))
+
+    def heights_of(self, fids):
+        '''fid数组 -> 楼层地面高度数组'''
+        return self.cum[self.floor_index(fids)]
+
+    def refresh(self, now: float = 0):
+        '''重新读取全部电梯的位置和时钟（创建、初始停靠后调用；运行中由引擎逐部 `update`）'''
+        np = _np()
+        building = self.building
+        n = len(building.elevators)
+        self.now = now
+        index = building.floor_range.index
+        self.pos = self.cum[[index(e.current_floor) for e in building.elevators]]
+        clock = building.car_clock if len(building.car_clock) == n else [0] * n
+        self.clock = np.array(clock, dtype=np.int64)
+    
+    def update(self, k: int):
+        '''电梯k移动或时钟变化后，就地更新它的位置和时钟'''
+        building = self.building
+        self.pos[k] = self.cum[building.floor_range.index(building.elevators[k].current_floor)]
+        self.clock[k] = building.car_clock[k]
+
+    def ready(self, ready=None):
+        '''
+        各电梯最早出发时间，形状为 (呼梯数, 电梯数)；`ready` 为各呼梯的时刻
+        （标量或数组，默认 `refresh` 的 `now`）
+        '''
+        np = _np()
+        r = np.atleast_1d(np.asarray(self.now if ready is None else ready, dtype=np.int64))[:, None]
+        start = np.maximum(self.clock[None, :], r)
+        for k, starts, ends in self.down:
+            col = start[:, k]
+            j = np.searchsorted(starts, col, side='right') - 1
+            inside = (j >= 0) & (col < ends[np.maximum(j, 0)])
+            start[:, k] = np.where(inside, ends[np.maximum(j, 0)], col)
+        return start
+
+    def matrix(self, call_floors: Sequence[int], ready=None):
+        '''返回形状为 (呼梯数, 电梯数) 的ETA矩阵（相对模拟开始的整数秒）'''
+        np = _np()
+        h = self.heights_of(call_floors)[:, None]            # (C, 1)
+        travel = np.abs(h - self.pos[None, :]) / self.speed[None, :]
+        # 与Tool.add_seconds相同：精确到微秒后截断到秒
+        return self.ready(ready) + np.rint(travel * 1_000_000).astype(np.int64) // 1_000_000
+
+    def best_cars(self, call_floors: Sequence[int], ready=None):
+        '''每个呼梯ETA最小的电梯（返回eid数组）和对应ETA，并列时取下标小的'''
+        np = _np()
+        m = self.matrix(call_floors, ready)
+        k = m.argmin(axis=1)
+        eids = np.array([e.eid for e in self.building.elevators])
+        return eids[k], m[np.arange(len(k)), k]
+
+    def trip_stops(self):
+        '''
+        各电梯本趟行程在 `now` 之后还要停靠的楼层（按引擎记录的 `car_stops`），
+        返回 (停靠高度矩阵（不足处为nan）, 停靠数, 方向：1向上、-1向下、0已空闲)
+        '''
+        np = _np()
+        building = self.building
+        n = len(building.elevators)
+        plans = building.car_stops if len(building.car_stops) == n else [()] * n
+        remaining, direction = [], np.zeros(n, dtype=np.int8)
+        for k, plan in enumerate(plans):
+            fids = [fid for t, fid in plan if t > self.now]
+            remaining.append(fids)
+            if fids:
+                first, last = plan[0][1], plan[-1][1]
+                direction[k] = (last > first) - (last < first)
+        width = max((len(s) for s in remaining), default=0)
+        stops = np.full((n, max(width, 1)), np.nan)
+        for k, s in enumerate(remaining):
+            if s:
+                stops[k, :len(s)] = self.heights_of(s)
+        return stops, np.array([len(s) for s in remaining], dtype=np.int64), direction
@@ -0,0 +1,112 @@
+'''数组存储的楼层表
+
+楼层不随时间变化，没必要每层一个带 `Timeline` 的对象。`FloorTable` 用
+`array('d')` 存高度，楼层号(fid)和下标之间直接换算（跳过0层），
+只有真正取用某一层时才创建对应的轻量视图 `FloorView`，且每层只创建一次。
+'''
+from __future__ import annotations
+from collections.abc import Mapping
+from array import array
+from typing import Iterator
+
+class FloorView:
+    '''楼层表中某一层的轻量视图，接口与 `Floor` 相同'''
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: FloorTable, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def fid(self) -> int:
+        return self.table.fid_at(self.index)
+
+    @property
+    def height(self) -> float:
+        return self.table.heights[self.index]
+
+    @height.setter
+    def height(self, value: float):
+        self.table.set_height(self.fid, value)
+
+    def __repr__(self):
+        return f'Floor(fid={self.fid}, height={self.height})'
+
+class FloorTable(Mapping):
+    '''fid -> 楼层的映射，兼容原先 `dict[int, Floor]` 的用法'''
+    __slots__ = ('lowest', 'highest', 'heights', '_cum', '_views', '_dirty')
+
+    def __init__(self, lowest: int, highest: int, normal_height: float = 3.0):
+        if lowest > highest:
+            lowest, highest = highest, lowest
+        # 没有0层，端点落在0上时向内收
+        lowest = 1 if lowest == 0 else lowest
+        highest = -1 if highest == 0 else highest
+        self.lowest = lowest
+        self.highest = highest
+        n = highest - lowest + 1 - (1 if lowest <= 0 <= highest else 0)
+        self.heights = array('d', [normal_height]) * n
+        self._cum: array = None
+        self._views: list[FloorView] = [None] * n
+        self._dirty = True
+
+    # fid和下标互换，跳过0层
+    def index(self, fid: int) -> int:
+        '''fid对应的下标；不在范围内（含0层）时抛出KeyError'''
+        if fid == 0 or not self.lowest <= fid <= self.highest:
+            raise KeyError(fid)
+        return fid - self.lowest - (1 if fid > 0 > self.lowest else 0)
+
+    def fid_at(self, index: int) -> int:
+        fid = self.lowest + index
+        return fid + 1 if fid >= 0 > self.lowest else fid
+
+    def __getitem__(self, fid: int) -> FloorView:
+        i = self.index(fid)
+        view = self._views[i]
+        if view is None:
+            view = self._views[i] = FloorView(self, i)
+        return view
+
+    def __setitem__(self, fid: int, floor):
+        '''兼容 `floor_range[f.fid] = Floor(...)` 的写法，只取其高度'''
+        self.set_height(fid, getattr(floor, 'height', floor))
+
+    def __contains__(self, fid) -> bool:
+        return isinstance(fid, int) and fid != 0 and self.lowest <= fid <= self.highest
+
+    def __iter__(self) -> Iterator[int]:
+        for f in range(self.lowest, self.highest + 1):
+            if f != 0:
+                yield f
+
+    def __len__(self) -> int:
+        return len(self.heights)
+
+    def __repr__(self):
+        return f'FloorTable({self.lowest} ~ {self.highest}, floors={len(self)})'
+
+    def set_height(self, fid: int, height: float):
+        self.heights[self.index(fid)] = height
+        self._dirty = True
+
+    @property
+    def cum_heights(self) -> array:
+        '''累计高度，cum_heights[i] 为下标i那层地面离最低层地面的高度'''
+        if self._dirty:
+            cum = array('d', [0.0])
+            total = 0.0
+            for h in self.heights:
+                total += h
+                cum.append(total)
+            self._cum = cum
+            self._dirty = False
+        return self._cum
+
+    def height_between(self, a: int, b: int) -> float:
+        '''两层之间的运行高度，结果与 `Tool.total_height` 相同'''
+        ia, ib = self.index(a), self.index(b)
+        if ia > ib:
+            ia, ib = ib, ia
+        cum = self.cum_heights
+        return cum[ib] - cum[ia]
@@ -271,7 +271,7 @@ class Building(SimCoreBaseObject):
         floor_keys = list(self.floor_range.keys())
         for elevator,current_floor in zip(self.elevators,self.get_parking_floors_optimized(len(self.elevators),floor_keys[0],floor_keys[-1])):
             elevator.current_floor = current_floor
-            yield from self.eventman.event('elevator_arrive', elevator=elevator, floor=Floor(elevator.current_floor), time_host=elevator)
+            yield from self.eventman.event('elevator_arrive', elevator=elevator, floor=self.floor_range[elevator.current_floor], time_host=elevator)
             yield from self.eventman.event('elevator_idle', elevator=elevator, time_host=elevator)
 
     def execute(self, method:Literal["FCFS", "SSTF", "LOOK"]="FCFS"):
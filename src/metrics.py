@@ -0,0 +1,188 @@
+'''滚动指标：模拟进行中增量维护的KPI
+
+`get_statistics` 只能在模拟结束后整体统计一次。`KpiTracker` 挂在事件订阅上，
+边模拟边更新：每分钟呼梯数、最近N分钟的平均/p95候梯时间、各层排队人数、
+各电梯载重率。时间窗用固定数量的桶组成的环形数组，分位数用固定分箱的直方图，
+这部分内存与模拟时长、乘客数无关，随时可以 `snapshot()` 读取，不必回扫事件。
+
+引擎按呼梯顺序处理乘客，上梯、下梯事件在呼梯时就已产生，时间可能远晚于当前时钟。
+这些事件（包括候梯时间样本）先放进按时间排序的堆，时钟走到了才计入，
+所以快照只反映当前时刻已经发生的事。堆的大小等于已呼梯、但上下梯还没发生的乘客数
+（每人最多两条），即引擎当时领先模拟时钟的那部分，拥堵时会随积压增长；
+`snapshot()` 的 `pending` 给出当前大小。
+'''
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, List
+import heapq
+
+# 直方图分箱边界（秒）：0、1，之后按1.2倍递增到约1小时，最后一箱收纳更大的值
+EDGES = (0.0,) + tuple(1.2 ** k for k in range(46))
+
+class SlidingWindow:
+    '''最近 `window` 秒内的计数、均值和分位数，固定内存'''
+    def __init__(self, window: float = 300, buckets: int = 30):
+        self.window = window
+        self.width = window / buckets
+        self.n = buckets
+        self.head = -1                       # 最新桶的绝对编号
+        self.counts = array('q', [0]) * buckets
+        self.sums = array('d', [0.0]) * buckets
+        self.hists = [array('q', [0]) * len(EDGES) for _ in range(buckets)]
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.total_hist = array('q', [0]) * len(EDGES)
+
+    def advance(self, t: float):
+        '''把窗口推进到时刻 `t`，过期的桶清零'''
+        b = int(t // self.width)
+        if b <= self.head:
+            return
+        for k in range(max(self.head + 1, b - self.n + 1), b + 1):
+            idx = k % self.n
+            if self.counts[idx]:
+                self.total_count -= self.counts[idx]
+                self.total_sum -= self.sums[idx]
+                hist = self.hists[idx]
+                for j, c in enumerate(hist):
+                    if c:
+                        self.total_hist[j] -= c
+                        hist[j] = 0
+                self.counts[idx] = 0
+                self.sums[idx] = 0.0
+        self.head = b
+
+    def add(self, t: float, value: float = None):
+        '''记录时刻 `t` 的一次观测；`value` 为None时只计数。早于窗口的观测直接丢弃'''
+        self.advance(t)
+        b = int(t // self.width)
+        if b <= self.head - self.n:
+            return
+        idx = b % self.n
+        self.counts[idx] += 1
+        self.total_count += 1
+        if value is not None:
+            self.sums[idx] += value
+            self.total_sum += value
+            j = max(bisect_right(EDGES, value) - 1, 0)
+            self.hists[idx][j] += 1
+            self.total_hist[j] += 1
+
+    def count(self) -> int:
+        return self.total_count
+
+    def rate_per_minute(self) -> float:
+        # 模拟刚开始时窗口还没填满，按已经过的时间折算
+        elapsed = min(self.window, (self.head + 1) * self.width) if self.head >= 0 else 0
+        return self.total_count * 60 / elapsed if elapsed else 0.0
+
+    def mean(self) -> float:
+        n = sum(self.total_hist)
+        return self.total_sum / n if n else 0.0
+
+    def quantile(self, q: float) -> float:
+        '''近似分位数，在所在分箱内线性插值'''
+        n = sum(self.total_hist)
+        if not n:
+            return 0.0
+        rank = q * n
+        seen = 0
+        for j, c in enumerate(self.total_hist):
+            if c and seen + c >= rank:
+                lo = EDGES[j]
+                hi = EDGES[j + 1] if j + 1 < len(EDGES) else lo * 1.2
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return EDGES[-1]
+
+class KpiTracker:
+    '''边模拟边维护的KPI，用 `attach` 挂到大楼上'''
+    EVENT_TYPES = ('call_elevator', 'passenger_board', 'passenger_alight', 'elevator_outweight',
+                   'passenger_balk', 'passenger_renege', 'end')
+
+    def __init__(self, window: float = 300, buckets: int = 30):
+        self.calls = SlidingWindow(window, buckets)
+        self.waits = SlidingWindow(window, buckets)
+        self.now = 0
+        self.queue: Dict[int, int] = {}        # fid -> 排队人数
+        self.load: Dict[int, float] = {}       # eid -> 当前载重
+        self.max_weight: Dict[int, float] = {}
+        self._call_time: Dict[int, float] = {}  # 仍在等待的乘客pid -> 呼梯时间
+        # 引擎先处理完一位乘客再处理下一位，上下客事件的时间可能晚于当前时刻，
+        # 先放进按时间排序的堆里，时钟走到了再生效（见模块说明）
+        self._pending: List[tuple] = []
+        self._seq = 0
+
+    def attach(self, building, live: bool = True):
+        '''
+        订阅大楼的相关事件。注意：有订阅后 `execute` 只返回被订阅的事件，
+        需要完整事件列表时另外 `building.eventman.subscribe()` 一个不限条件的订阅
+        '''
+        for e in building.elevators:
+            self.max_weight[e.eid] = e.max_weight
+            self.load.setdefault(e.eid, 0.0)
+        return building.eventman.subscribe(self.observe, event_types=self.EVENT_TYPES, live=live)
+
+    def _defer(self, t: float, kind: str, key: int, delta: float):
+        self._seq += 1
+        heapq.heappush(self._pending, (t, self._seq, kind, key, delta))
+
+    def _drain(self):
+        pending = self._pending
+        while pending and pending[0][0] <= self.now:
+            t, _, kind, key, delta = heapq.heappop(pending)
+            if kind == 'wait':
+                self.waits.add(t, delta)
+                continue
+            target = self.queue if kind == 'queue' else self.load
+            target[key] = target.get(key, 0) + delta
+
+    def advance(self, t: float):
+        '''把时钟推进到 `t`，此前发生的上下梯计入指标'''
+        if t > self.now:
+            self.now = t
+            self.calls.advance(t)
+            self.waits.advance(t)
+        self._drain()
+
+    def observe(self, event: Dict[str, Any]):
+        '''处理一个事件'''
+        t = event['relative_time']
+        passenger = event['passenger']
+        match event['event_type']:
+            case 'call_elevator':
+                # 乘客按出现时间顺序处理，呼梯时间就是模拟时钟
+                self.advance(t)
+                self.calls.add(t)
+                fid = event['floor'].fid
+                self.queue[fid] = self.queue.get(fid, 0) + 1
+                self._call_time[passenger.pid] = t
+            case 'passenger_board':
+                self._defer(t, 'queue', event['floor'].fid, -1)
+                self._defer(t, 'load', event['elevator'].eid, passenger.weight)
+                self._defer(t, 'wait', 0, max(t - self._call_time.pop(passenger.pid, t), 0))
+            case 'elevator_outweight' | 'passenger_balk' | 'passenger_renege':
+                # 没能上梯就离开了
+                self._call_time.pop(passenger.pid, None)
+                self._defer(t, 'queue', passenger.from_floor, -1)
+            case 'passenger_alight':
+                self._defer(t, 'load', event['elevator'].eid, -passenger.weight)
+            case 'end':
+                # 模拟结束，剩下的上下梯都已发生
+                self.advance(t)
+        self._drain()
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''当前KPI'''
+        return {
+            'time': self.now,
+            'calls_per_minute': self.calls.rate_per_minute(),
+            'avg_wait': self.waits.mean(),
+            'p95_wait': self.waits.quantile(0.95),
+            'waiting': sum(self.queue.values()),
+            'queue_lengths': {f: n for f, n in self.queue.items() if n},
+            'load_factor': {eid: (self.load.get(eid, 0) / w if w else 0.0)
+                            for eid, w in self.max_weight.items()},
+            'pending': len(self._pending),
+        }
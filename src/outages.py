@@ -0,0 +1,138 @@
+'''电梯停运：随机故障和计划维保
+
+停运是模拟时钟上的时间段，按电梯记录，同一部电梯重叠或相接的时间段会合并。
+- 随机故障：故障间隔服从均值为MTBF的指数分布，修复时间服从均值为MTTR的指数分布
+- 计划维保：指定开始时间和时长
+
+调度时不用扫描乘客：引擎在派梯、出发前查询 `next_free`（二分查找），
+停运中的电梯要等到恢复才能出发，于是ETA变大，新呼梯自然分给其他电梯；
+FCFS乘客呼叫的电梯停运时，在处理该乘客时改派给ETA最小的电梯。
+停运开始时正在运行的行程会先跑完（车内乘客送到目的层）。
+'''
+from __future__ import annotations
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import math
+import random
+
+FAULT = 'fault'
+MAINTENANCE = 'maintenance'
+
+class Outage(NamedTuple):
+    '''一次停运（时间为相对模拟开始的秒数）'''
+    eid: int
+    start: int
+    end: int
+    kind: str
+
+class OutageSchedule:
+    '''整栋楼的停运计划，配置项在多次模拟之间保留'''
+    def __init__(self):
+        self.outages: List[Outage] = []
+        self._windows: Dict[int, tuple[List[int], List[int]]] = {}  # eid -> (开始列表, 结束列表)
+
+    def __len__(self) -> int:
+        return len(self.outages)
+
+    def __iter__(self):
+        return iter(sorted(self.outages, key=lambda o: (o.start, o.eid)))
+
+    def __repr__(self):
+        return f'OutageSchedule(outages={len(self.outages)})'
+
+    def add(self, eid: int, start: float, end: float, kind: str = MAINTENANCE) -> Outage:
+        '''电梯 `eid` 在 [start, end) 秒内停运'''
+        assert end > start >= 0, "停运时间段无效"
+        outage = Outage(eid, int(start), math.ceil(end), kind)
+        self.outages.append(outage)
+        self._merge(eid, outage.start, outage.end)
+        return outage
+
+    def add_maintenance(self, eid: int, start: float, duration: float) -> Outage:
+        return self.add(eid, start, start + duration, MAINTENANCE)
+
+    def add_random_faults(self,
+                          eids: Iterable[int],
+                          mtbf: float,
+                          mttr: float,
+                          until: float,
+                          seed: Optional[int] = None
+                          ) -> List[Outage]:
+        '''在 [0, until) 秒内为每部电梯生成随机故障，种子相同时结果相同'''
+        assert mtbf > 0 and mttr > 0, "MTBF和MTTR必须大于0"
+        rng = random.Random(seed)
+        added = []
+        for eid in eids:
+            t = rng.expovariate(1 / mtbf)
+            while t < until:
+                repair = max(rng.expovariate(1 / mttr), 1)
+                added.append(self.add(eid, t, t + repair, FAULT))
+                t += repair + rng.expovariate(1 / mtbf)
+        return added
+
+    def clear(self):
+        self.outages.clear()
+        self._windows.clear()
+
+    def _merge(self, eid: int, start: int, end: int):
+        starts, ends = self._windows.setdefault(eid, ([], []))
+        j = bisect_right(starts, start)
+        # 与前一段重叠或相接
+        if j and ends[j - 1] >= start:
+            j -= 1
+            start = starts[j]
+            end = max(end, ends[j])
+            del starts[j], ends[j]
+        # 吞并后面被覆盖的时间段
+        while j < len(starts) and starts[j] <= end:
+            end = max(end, ends[j])
+            del starts[j], ends[j]
+        starts.insert(j, start)
+        ends.insert(j, end)
+
+    def windows(self, eid: int) -> tuple[List[int], List[int]]:
+        '''电梯 `eid` 合并后的停运时间段 (开始列表, 结束列表)，均已排序'''
+        return self._windows.get(eid, ([], []))
+
+    def next_free(self, eid: int, t: float) -> float:
+        '''电梯 `eid` 在 `t` 之后最早可以出发的时间'''
+        starts, ends = self._windows.get(eid, ((), ()))
+        j = bisect_right(starts, t) - 1
+        if j >= 0 and t < ends[j]:
+            return ends[j]
+        return t
+
+    def in_service(self, eid: int, t: float) -> bool:
+        return self.next_free(eid, t) == t
+
+    def degraded_periods(self) -> tuple[List[int], List[int]]:
+        '''至少有一部电梯停运的时间段（所有电梯的停运合并）'''
+        union = OutageSchedule()
+        for o in self.outages:
+            union._merge(-1, o.start, o.end)
+        return union.windows(-1)
+
+    def wait_report(self, store) -> Dict[str, Dict[str, float]]:
+        '''按乘客呼梯时是否处于降级时段（有电梯停运），分别统计候梯时间'''
+        from src.passengers import DONE
+
+        starts, ends = self.degraded_periods()
+        waits: Dict[str, List[float]] = {'normal': [], 'degraded': []}
+        for i in range(len(store)):
+            if store.status[i] != DONE:
+                continue
+            t = store.appear[i]
+            j = bisect_right(starts, t) - 1
+            key = 'degraded' if j >= 0 and t < ends[j] else 'normal'
+            waits[key].append(store.board_time[i] - t)
+        report = {}
+        for key, w in waits.items():
+            w.sort()
+            n = len(w)
+            report[key] = {
+                'passengers': n,
+                'avg_wait': sum(w) / n if n else 0.0,
+                'p95_wait': w[min(n - 1, int(0.95 * n))] if n else 0.0,
+                'max_wait': w[-1] if n else 0.0,
+            }
+        return report
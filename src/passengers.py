@@ -0,0 +1,160 @@
+'''列式乘客存储
+
+乘客数量到百万级时，每人一个带 `__dict__` 和 `Timeline` 的对象会占用数GB内存。
+`PassengerStore` 把所有乘客按列存进 `array`，模拟核心只处理下标；
+只有事件、统计等需要对象时，才按需创建轻量视图 `PassengerView`。
+时间一律存为相对模拟开始时间的秒数。
+'''
+from __future__ import annotations
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from src.base import Tool
+
+# 乘客状态
+WAITING = 0    # 尚未处理
+DONE = 1       # 已送达
+REJECTED = 2   # 超载，未能上电梯
+BALKED = 3     # 候梯处太拥挤，到达后直接离开
+RENEGED = 4    # 等待太久，离开队列
+
+NO_TIME = float('nan')
+
+class PassengerView:
+    '''乘客存储中某一位乘客的视图，接口与 `Passenger` 相同'''
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: PassengerStore, index: int):
+        self.store = store
+        self.index = index
+
+    pid = property(lambda self: self.store.pid[self.index])
+    weight = property(lambda self: self.store.weight[self.index])
+    from_floor = property(lambda self: self.store.from_floor[self.index])
+    to_floor = property(lambda self: self.store.to_floor[self.index])
+    call_eid = property(lambda self: self.store.call_eid[self.index])
+    name = property(lambda self: self.store.name(self.index))
+    appear_time = property(lambda self: self.store.time_str(self.store.appear[self.index]))
+    is_processed = property(lambda self: self.store.status[self.index] != WAITING)
+    on_board = property(lambda self: False)  # 核心处理完一位乘客才会返回
+
+    def __repr__(self):
+        return f'Passenger(pid={self.pid}, weight={self.weight}, name={self.name}, from_floor={self.from_floor}, to_floor={self.to_floor})'
+
+class PassengerStore:
+    '''按列存储的乘客集合，可当作乘客列表使用（迭代、下标、append）'''
+    def __init__(self, start_time: str = '1970/01/01 00:00:00'):
+        self.start_time = start_time
+        self._start_dt = datetime.strptime(start_time, '%Y/%m/%d %H:%M:%S')
+        self.pid = array('q')
+        self.weight = array('d')
+        self.from_floor = array('i')
+        self.to_floor = array('i')
+        self.appear = array('d')       # 出现时间（秒）
+        self.call_eid = array('i')
+        self.status = array('b')
+        self.board_time = array('d')   # 上电梯时间（秒）
+        self.alight_time = array('d')  # 下电梯时间（秒）
+        self._names: dict[int, str] = {}  # 只记录有名字的乘客
+        self._objects: list = None         # 由Passenger对象导入时保留原对象
+
+    def __len__(self) -> int:
+        return len(self.pid)
+
+    def __iter__(self) -> Iterator:
+        for i in range(len(self.pid)):
+            yield self.get(i)
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += len(self.pid)
+        if not 0 <= i < len(self.pid):
+            raise IndexError(i)
+        return self.get(i)
+
+    def __repr__(self):
+        return f'PassengerStore(passengers={len(self)})'
+
+    def time_str(self, seconds: float) -> str:
+        return (self._start_dt + timedelta(seconds=seconds)).strftime('%Y/%m/%d %H:%M:%S')
+
+    def name(self, i: int) -> str:
+        return self._names.get(i, '无名氏')
+
+    def add(self,
+            pid: int,
+            from_floor: int,
+            to_floor: int,
+            appear: float|str = 0,
+            weight: float = 70,
+            call_eid: int = 0,
+            name: str = None
+            ) -> int:
+        '''追加一位乘客，返回其下标。`appear` 可以是秒数或时间字符串'''
+        if isinstance(appear, str):
+            appear = Tool.time_difference_seconds(self.start_time, appear)
+        assert appear >= 0, "乘客出现时间必须在模拟开始时间之后"
+        i = len(self.pid)
+        self.pid.append(pid)
+        self.weight.append(weight)
+        self.from_floor.append(from_floor)
+        self.to_floor.append(to_floor)
+        self.appear.append(appear)
+        self.call_eid.append(call_eid)
+        self.status.append(WAITING)
+        self.board_time.append(NO_TIME)
+        self.alight_time.append(NO_TIME)
+        if name:
+            self._names[i] = name
+        if self._objects is not None:
+            self._objects.append(None)
+        return i
+
+    def append(self, passenger) -> int:
+        '''追加一个 `Passenger` 对象（兼容 `building.passengers.append`）'''
+        if self._objects is None:
+            self._objects = [None] * len(self.pid)
+        i = self.add(passenger.pid, passenger.from_floor, passenger.to_floor,
+                     passenger.appear_time, passenger.weight, passenger.call_eid)
+        self._objects[i] = passenger
+        return i
+
+    def extend(self, passengers: Iterable):
+        for p in passengers:
+            self.append(p)
+
+    def get(self, i: int):
+        '''返回原 `Passenger` 对象；纯列式乘客则新建视图'''
+        if self._objects is not None:
+            obj = self._objects[i]
+            if obj is not None:
+                return obj
+        return PassengerView(self, i)
+
+    def order_by_appear(self) -> list[int]:
+        '''按出现时间排序的下标（稳定排序）'''
+        return sorted(range(len(self.pid)), key=self.appear.__getitem__)
+
+    def reset(self):
+        '''清空处理结果，便于重新模拟'''
+        n = len(self.pid)
+        self.status = array('b', bytes(n))
+        self.board_time = array('d', [NO_TIME]) * n
+        self.alight_time = array('d', [NO_TIME]) * n
+
+    def count(self, status: int) -> int:
+        return self.status.count(status)
+
+    def sync_objects(self):
+        '''把处理结果写回原 `Passenger` 对象'''
+        if self._objects is None:
+            return
+        for i, p in enumerate(self._objects):
+            if p is None:
+                continue
+            st = self.status[i]
+            p.is_processed = st != WAITING
+            p.on_board = False
+            if st == DONE:
+                p.timeline.update_from_time(self.time_str(self.board_time[i]))
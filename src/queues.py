@@ -0,0 +1,166 @@
+'''楼层候梯队列
+
+每层分上行、下行两条先进先出队列（`deque`，入队出队均为O(1)）。
+- 拥挤放弃(balk)：乘客到达时该层排队人数已达上限，直接离开
+- 等待放弃(renege)：排队超过 `patience` 秒仍没上梯，离开队列
+所有乘客的耐心相同，同一队列中的放弃时间与到达顺序一致，
+所以过期的乘客总在队首，惰性地从左端弹出即可，每位乘客最多处理一次。
+
+电梯载重不同时，某部电梯空载也载不动的乘客留在原位等更大的电梯，
+不挡住排在后面、这部电梯载得动的乘客。
+'''
+from __future__ import annotations
+from collections import deque
+from typing import List, Optional
+import heapq
+
+class HallQueue:
+    '''一层楼的候梯队列，队列中存的是乘客下标'''
+    __slots__ = ('up', 'down')
+
+    def __init__(self):
+        self.up: deque[int] = deque()
+        self.down: deque[int] = deque()
+
+    def __len__(self) -> int:
+        return len(self.up) + len(self.down)
+
+    def lane(self, up: bool) -> deque[int]:
+        return self.up if up else self.down
+
+class HallQueues:
+    '''整栋楼的候梯队列，配置项在多次模拟之间保留'''
+    def __init__(self,
+                 floor_range,
+                 lobby: int = 1,
+                 lobby_capacity: Optional[int] = None,
+                 capacity: Optional[int] = None,
+                 patience: Optional[float] = None
+                 ):
+        self.floor_range = floor_range
+        self.lobby = lobby                    # 大堂楼层
+        self.lobby_capacity = lobby_capacity  # 大堂最多排队人数，None表示不限
+        self.capacity = capacity              # 其他楼层最多排队人数，None表示不限
+        self.patience = patience              # 最长等待秒数，None表示不会放弃
+        self.appear = None
+        self.reset()
+
+    def reset(self, appear=None):
+        '''清空队列；`appear` 为乘客出现时间列（PassengerStore.appear）'''
+        self.appear = appear
+        self._queues: List[Optional[HallQueue]] = [None] * len(self.floor_range)
+        self._calls: list = []   # 候梯队首的堆：(队首出现时间, 序号, fid, 是否上行)
+        self._seq = 0
+        self.waiting = 0
+        self.reneged: List[tuple[int, int]] = []  # 待处理的放弃记录：(乘客下标, fid)
+
+    def queue(self, fid: int) -> HallQueue:
+        idx = self.floor_range.index(fid)
+        q = self._queues[idx]
+        if q is None:
+            q = self._queues[idx] = HallQueue()
+        return q
+
+    def capacity_of(self, fid: int) -> Optional[int]:
+        return self.lobby_capacity if fid == self.lobby else self.capacity
+
+    def _push_head(self, fid: int, up: bool, lane: deque[int]):
+        if lane:
+            self._seq += 1
+            heapq.heappush(self._calls, (self.appear[lane[0]], self._seq, fid, up))
+
+    def expire(self, fid: int, up: bool, t: float):
+        '''时刻 `t` 前已放弃的乘客出队，记入 `reneged`'''
+        if self.patience is None:
+            return
+        lane = self.queue(fid).lane(up)
+        changed = False
+        while lane and self.appear[lane[0]] + self.patience < t:
+            i = lane.popleft()
+            self.reneged.append((i, fid))
+            self.waiting -= 1
+            changed = True
+        if changed:
+            self._push_head(fid, up, lane)
+
+    def join(self, i: int, fid: int, up: bool, t: float) -> bool:
+        '''乘客i在时刻t到达fid层排队；该层已满时返回False（拥挤放弃）'''
+        q = self.queue(fid)
+        self.expire(fid, True, t)
+        self.expire(fid, False, t)
+        cap = self.capacity_of(fid)
+        if cap is not None and len(q) >= cap:
+            return False
+        lane = q.lane(up)
+        lane.append(i)
+        self.waiting += 1
+        if len(lane) == 1:
+            self._push_head(fid, up, lane)
+        return True
+
+    def _current(self, call: tuple, t: float) -> Optional[deque[int]]:
+        '''候梯记录仍有效（处理过期后队首未变）时返回该队列'''
+        appear, _, fid, up = call
+        lane = self.queue(fid).lane(up)
+        if not lane or self.appear[lane[0]] != appear:
+            return None
+        self.expire(fid, up, t)
+        if lane and self.appear[lane[0]] == appear:
+            return lane
+        return None
+
+    def oldest(self, t: float, weight=None, carry: Optional[float] = None) -> Optional[tuple[int, bool]]:
+        '''
+        时刻t已经在等的、队首最早到达的队列(fid, 是否上行)；没有则返回None。
+        给出体重列 `weight` 和电梯最大载重 `carry` 时，跳过没有一位乘客载得动的队列
+        '''
+        calls = self._calls
+        while calls:
+            call = calls[0]
+            if call[0] > t:
+                return None
+            lane = self._current(call, t)
+            if lane is None:
+                if calls and calls[0] is call:
+                    heapq.heappop(calls)  # 过时的队首记录
+                continue
+            if carry is None or any(weight[i] <= carry for i in lane):
+                return call[2], call[3]
+            break
+        else:
+            return None
+        # 最早的队列这部电梯接不了，按到达顺序找下一条（少见，不必维护额外的索引）
+        for call in sorted(calls)[1:]:
+            if call[0] > t:
+                break
+            lane = self._current(call, t)
+            if lane is not None and any(weight[i] <= carry for i in lane):
+                return call[2], call[3]
+        return None
+
+    def next_call_time(self) -> Optional[float]:
+        '''最早的候梯时间（可能是过时记录，只用于决定电梯空等到何时）'''
+        return self._calls[0][0] if self._calls else None
+
+    def take(self, fid: int, up: bool, load, weight) -> List[int]:
+        '''
+        按先来后到从队列中取出乘客，装进 `load`（`CarLoad`），直到载重或人数到上限。
+        超过这部电梯最大载重的乘客留在队列原位
+        '''
+        lane = self.queue(fid).lane(up)
+        taken, skipped = [], []
+        while lane:
+            w = weight[lane[0]]
+            if w > load.max_weight:
+                skipped.append(lane.popleft())
+                continue
+            if not load.fits(w):
+                break
+            i = lane.popleft()
+            load.add(w)
+            taken.append(i)
+        if skipped:
+            lane.extendleft(reversed(skipped))
+        self.waiting -= len(taken)
+        self._push_head(fid, up, lane)
+        return taken
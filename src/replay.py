@@ -0,0 +1,191 @@
+'''确定性重放与事件日志对比
+
+同一个场景加同一个种子，模拟结果应该完全一致。这里把每个事件规范化成
+`[事件类型, 相对时间, eid, pid, fid]`，逐条流式计算哈希作为指纹，
+并可以逐条对比两份事件日志，找出第一处分歧和各类事件数量的差别。
+两边都是流式处理，不需要把整份日志读进内存。
+
+命令行::
+
+    python -m src.replay record 场景.json -o current.jsonl [--seed 1] [--engine legacy]
+    python -m src.replay diff current.jsonl legacy.jsonl
+'''
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+
+from src.scenario import Topology, load_scenario
+
+ENGINES = ('current', 'legacy')
+
+def canonical(event: Dict[str, Any]) -> list:
+    '''事件 -> 规范记录，只保留与实现无关的字段'''
+    elevator, passenger, floor = event['elevator'], event['passenger'], event['floor']
+    return [
+        event['event_type'],
+        float(event['relative_time']),
+        elevator.eid if elevator is not None else None,
+        passenger.pid if passenger is not None else None,
+        getattr(floor, 'fid', floor),  # 旧引擎有时直接传楼层号
+    ]
+
+def _encode(rec: list) -> bytes:
+    return json.dumps(rec, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def fingerprint(events: Iterable[Dict[str, Any]]) -> str:
+    '''事件流的指纹（sha256），逐条计算'''
+    h = hashlib.sha256()
+    for event in events:
+        h.update(_encode(canonical(event)))
+        h.update(b'\n')
+    return h.hexdigest()
+
+def build_legacy(topology: Topology):
+    '''按场景创建旧版（生成器）引擎的 `Building`'''
+    from src.legacy.elevator import Building, Elevator, Passenger, Floor
+
+    building = Building(
+        floor_range=(Floor(topology.fids[0]), Floor(topology.fids[-1])),
+        start_time=topology.start_time,
+        bid=topology.bid,
+        name=topology.name,
+        normal_height=topology.normal_height
+    )
+    for fid, h in zip(topology.fids, topology.heights):
+        if h != topology.normal_height:
+            building.floor_range[fid] = Floor(fid, h)
+    building.elevators = tuple(
+        Elevator(eid=c.eid, name=c.name, max_weight=c.max_weight, building=building,
+                 speed=c.speed, height=c.height, idle_time=c.idle_time)
+        for c in topology.cars
+    )
+    building.passengers = [
+        Passenger(pid=p.pid, weight=p.weight, name=p.name or None, building=building,
+                  appear_time=p.appear_time, from_floor=p.from_floor, to_floor=p.to_floor,
+                  call_eid=p.call_eid)
+        for p in topology.passengers
+    ]
+    return building
+
+def run_events(topology: Topology, engine: str = 'current') -> Iterator[Dict[str, Any]]:
+    '''用指定引擎运行场景，逐个产出事件'''
+    match engine:
+        case 'current':
+            yield from topology.build().execute(topology.strategy)
+        case 'legacy':
+            yield from build_legacy(topology).execute(topology.strategy)
+        case _:
+            raise ValueError(f"未知引擎: {engine}")
+
+def record_run(path: str, out: str, seed: int = None, engine: str = 'current') -> str:
+    '''
+    运行场景并把规范事件日志写入 `out`（JSON Lines），返回指纹。
+    第一行记录场景哈希、种子和引擎，最后一行记录事件数和指纹。
+    '''
+    from src.elevator import ENGINE_VERSION
+
+    topology = load_scenario(path, seed=seed)
+    h = hashlib.sha256()
+    count = 0
+    with open(out, 'wb') as f:
+        f.write(_encode({'scenario': topology.digest, 'seed': seed, 'engine': engine,
+                         'engine_version': ENGINE_VERSION if engine == 'current' else 0}) + b'\n')
+        for event in run_events(topology, engine):
+            line = _encode(canonical(event)) + b'\n'
+            f.write(line)
+            h.update(line)
+            count += 1
+        digest = h.hexdigest()
+        f.write(_encode({'events': count, 'fingerprint': digest}) + b'\n')
+    return digest
+
+def read_log(path: str) -> Iterator[list]:
+    '''逐条读取 `record_run` 写出的日志中的规范记录（跳过首尾两行元数据）'''
+    with open(path, 'rb') as f:
+        for line in f:
+            rec = json.loads(line)
+            if isinstance(rec, list):
+                yield rec
+
+class LogDiff(NamedTuple):
+    '''两份事件日志的对比结果'''
+    first_divergence: Optional[int]  # 第一处不同的事件序号，None表示完全相同
+    left: Optional[list]             # 该处左侧记录（左侧已结束时为None）
+    right: Optional[list]
+    count_left: int
+    count_right: int
+    type_counts: Dict[str, tuple[int, int]]  # 事件类型 -> (左侧数量, 右侧数量)
+    end_left: float
+    end_right: float
+
+    @property
+    def identical(self) -> bool:
+        return self.first_divergence is None
+
+    def report(self) -> str:
+        if self.identical:
+            return f"两份日志相同，共 {self.count_left} 个事件"
+        lines = [
+            f"第 {self.first_divergence} 个事件开始不同：",
+            f"  左: {self.left}",
+            f"  右: {self.right}",
+            f"事件总数：{self.count_left} / {self.count_right}，结束时间：{self.end_left} / {self.end_right} 秒",
+        ]
+        for t, (a, b) in sorted(self.type_counts.items()):
+            if a != b:
+                lines.append(f"  {t}: {a} / {b}（{b - a:+d}）")
+        return '\n'.join(lines)
+
+def diff_records(left: Iterable[list], right: Iterable[list]) -> LogDiff:
+    '''逐条对比两个规范记录流'''
+    first = None
+    first_pair = (None, None)
+    counts: Dict[str, list[int]] = {}
+    n = [0, 0]
+    end = [0.0, 0.0]
+    for i, (a, b) in enumerate(itertools.zip_longest(left, right)):
+        for side, rec in ((0, a), (1, b)):
+            if rec is not None:
+                counts.setdefault(rec[0], [0, 0])[side] += 1
+                n[side] += 1
+                end[side] = max(end[side], rec[1])
+        if first is None and a != b:
+            first = i
+            first_pair = (a, b)
+    return LogDiff(first, first_pair[0], first_pair[1], n[0], n[1],
+                   {t: (c[0], c[1]) for t, c in counts.items()}, end[0], end[1])
+
+def diff_logs(left: str, right: str) -> LogDiff:
+    '''对比两个日志文件'''
+    return diff_records(read_log(left), read_log(right))
+
+def diff_events(left: Iterable[Dict[str, Any]], right: Iterable[Dict[str, Any]]) -> LogDiff:
+    '''直接对比两个事件流（例如新旧引擎的 `execute` 结果）'''
+    return diff_records(map(canonical, left), map(canonical, right))
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m src.replay', description='确定性重放与事件日志对比')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help='运行场景并写出规范事件日志')
+    rec.add_argument('scenario')
+    rec.add_argument('-o', '--out', required=True)
+    rec.add_argument('--seed', type=int)
+    rec.add_argument('--engine', choices=ENGINES, default='current')
+    dif = sub.add_parser('diff', help='对比两份事件日志')
+    dif.add_argument('left')
+    dif.add_argument('right')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'record':
+        print(record_run(args.scenario, args.out, args.seed, args.engine))
+        return 0
+    result = diff_logs(args.left, args.right)
+    print(result.report())
+    return 0 if result.identical else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,350 @@
+'''强化学习用的派梯环境
+
+`DispatchEnv` 是gym风格的 `reset()` / `step(action)` 环境：乘客按出现时间依次呼梯，
+每一步为当前这位乘客选一部电梯（动作是电梯下标），引擎用 `Building.run_trip`
+把乘客送到，奖励是负的候梯秒数。载不动（超重或超员）的乘客直接拒载，奖励为 `-reject_penalty`。
+
+观测是固定长度的float32数组，每步原地更新、不重新分配（需要保留时请自行copy）。
+n部电梯、F层楼时依次为：
+- [0, n)        各电梯所在楼层（楼层表下标归一化到0~1）
+- [n, 2n)       各电梯已分配、尚未下梯的乘客重量 / 最大载重
+- [2n, 3n)      各电梯运行方向：1向上，-1向下，0空闲
+- [3n, 4n)      各电梯还要忙多久（秒）/ `time_scale`
+- [4n, 4n+F)    上行候梯位图：当前时刻已登记、尚未派梯的呼梯（`lookahead` > 0 时另含此后若干秒内会出现的呼梯）
+- [4n+F, 4n+2F) 下行候梯位图
+- 最后3个       当前呼梯的出发层、目的层（归一化）和方向（1向上）
+
+`VecDispatchEnv` 把多个环境的观测放进同一个二维数组，一次 `step` 推进所有大楼，
+结束的环境自动重置。步进吞吐量是一等指标，见 `benchmark` 和 `STEP_TARGET`::
+
+    python -m src.rl [场景.json] [--steps 100000] [--envs 8]
+
+`lookahead` 默认为0，观测只含部署时真正拿得到的信息。大于0时候梯位图会提前显示未来的呼梯，
+这是只有模拟里才有的“先知”信息，只用于对比上限或辅助训练，用它训练的策略不能直接部署。
+
+需要NumPy（首次使用时才导入）。
+'''
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import heapq
+import sys
+import time
+
+from src.passengers import DONE, REJECTED
+from src.utils.lazy import require
+
+# 单核步进吞吐量目标（步/秒），`benchmark` 会报告是否达到
+STEP_TARGET = 50_000
+
+def _np():
+    return require('numpy', '强化学习环境')
+
+class DispatchEnv:
+    '''
+    基于 `Building` 的单栋大楼派梯环境。运行中给大楼挂一个空的事件订阅，不生成事件；
+    用完请 `close()`（或用with语句），取消订阅后大楼的 `execute` 恢复原样。
+    `lookahead` 秒数大于0时候梯位图包含未来的呼梯（先知模式，见模块说明）
+    '''
+    def __init__(self,
+                 building,
+                 lookahead: float = 0,
+                 time_scale: float = 300,
+                 reject_penalty: float = 600,
+                 out=None
+                 ):
+        np = _np()
+        self.building = building
+        assert lookahead >= 0, "lookahead不能为负"
+        self.lookahead = lookahead
+        self.time_scale = time_scale
+        self.reject_penalty = reject_penalty
+        self.n_cars = n = len(building.elevators)
+        self.n_floors = F = len(building.floor_range)
+        self.observation_size = 4 * n + 2 * F + 3
+        self.n_actions = n
+        if out is None:
+            out = np.zeros(self.observation_size, dtype=np.float32)
+        assert out.shape == (self.observation_size,) and out.dtype == np.float32, "观测缓冲区形状或类型不对"
+        self.obs = out
+        # 各段的视图，原地写入
+        self.obs_floor = out[0:n]
+        self.obs_load = out[n:2 * n]
+        self.obs_dir = out[2 * n:3 * n]
+        self.obs_busy = out[3 * n:4 * n]
+        self.obs_hall_up = out[4 * n:4 * n + F]
+        self.obs_hall_down = out[4 * n + F:4 * n + 2 * F]
+        self.obs_call = out[4 * n + 2 * F:]
+        self._hall_at = (4 * n + F, 4 * n)  # [下行, 上行]位图的起点
+
+        # 挂一个不要任何事件类型的订阅，emit 直接跳过；close()时取消
+        self._subscription = building.eventman.subscribe(event_types=())
+        self._order: Optional[List[int]] = None
+        self._floor_norm = 1 / max(F - 1, 1)
+        self._fidx = {fid: building.floor_range.index(fid) for fid in building.floor_range}
+        self._max_weight = [e.max_weight for e in building.elevators]
+        # 电梯数不多，逐个写memoryview比调用几次NumPy函数还快；
+        # 放进VecDispatchEnv后由它对所有大楼整组计算忙碌时间和方向
+        self._mv = memoryview(out)
+        self._heading = [0.0] * n  # 最近一趟的方向
+        self._batch = None         # (电梯时钟行, 方向行)，由VecDispatchEnv设置
+        self.info: Dict[str, Any] = {}
+        self.done = True
+
+    @classmethod
+    def from_topology(cls, topology, **kwargs) -> DispatchEnv:
+        return cls(topology.build(), **kwargs)
+
+    def close(self):
+        '''取消事件订阅，可以重复调用'''
+        if self._subscription is not None:
+            self.building.eventman.unsubscribe(self._subscription)
+            self._subscription = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self, seed: Optional[int] = None):
+        '''开始新一轮（客流由场景决定，`seed` 仅为接口兼容）。返回 (观测, info)'''
+        b = self.building
+        store = b.passenger_store
+        if self._order is None:
+            self._order = store.order_by_appear()  # 出现时间不会变，只排序一次
+        b.reset_cars()
+        b.elevator_initpark()
+        store.reset()
+        self.obs.fill(0)
+        self._ptr = 0
+        self._win = 0
+        self._hall = [[0] * self.n_floors, [0] * self.n_floors]  # [下行, 上行]各层候梯数
+        self._onboard: List[list] = [[] for _ in range(self.n_cars)]  # 每部电梯 (下梯时间, 重量) 的堆
+        self._load = [0.0] * self.n_cars
+        self._heading = [0.0] * self.n_cars
+        if self._batch is not None:
+            self._batch[0][:] = b.car_clock
+            self._batch[1].fill(0)
+        for k, elevator in enumerate(b.elevators):
+            self.obs_floor[k] = self._fidx[elevator.current_floor] * self._floor_norm
+        self.episode_reward = 0.0
+        self.done = not len(self._order)
+        self.info.clear()
+        self._observe()
+        return self.obs, self.info
+
+    def _observe(self):
+        '''推进候梯窗口并刷新观测'''
+        b = self.building
+        store = b.passenger_store
+        order = self._order
+        index = self._fidx.__getitem__
+        if self._ptr < len(order):
+            i = order[self._ptr]
+            now = store.appear[i]
+            # 已登记的呼梯（先知模式下还有前瞻窗口内的）
+            limit = now + self.lookahead
+            while self._win < len(order) and store.appear[order[self._win]] <= limit:
+                j = order[self._win]
+                self._win += 1
+                up = store.to_floor[j] > store.from_floor[j]
+                f = index(store.from_floor[j])
+                row = self._hall[up]
+                row[f] += 1
+                if row[f] == 1:
+                    self._mv[self._hall_at[up] + f] = 1.0
+            f0, f1 = index(store.from_floor[i]), index(store.to_floor[i])
+            at = 4 * self.n_cars + 2 * self.n_floors
+            self._mv[at] = f0 * self._floor_norm
+            self._mv[at + 1] = f1 * self._floor_norm
+            self._mv[at + 2] = 1.0 if f1 > f0 else 0.0
+        else:
+            now = max(b.car_clock, default=0)
+        self.now = now
+
+        for k, heap in enumerate(self._onboard):
+            if heap and heap[0][0] <= now:
+                while heap and heap[0][0] <= now:
+                    self._load[k] -= heapq.heappop(heap)[1]
+                self._mv[self.n_cars + k] = self._load[k] / self._max_weight[k]
+        if self._batch is not None:
+            return
+        mv, n, scale = self._mv, self.n_cars, 1 / self.time_scale
+        for k, clock in enumerate(b.car_clock):
+            busy = clock - now
+            if busy > 0:
+                mv[3 * n + k] = busy * scale
+                mv[2 * n + k] = self._heading[k]
+            else:
+                mv[3 * n + k] = 0.0
+                mv[2 * n + k] = 0.0
+
+    def step(self, action: int):
+        '''为当前呼梯派电梯 `action`，返回 (观测, 奖励, terminated, truncated, info)'''
+        assert not self.done, "本轮已结束，请先reset()"
+        b = self.building
+        store = b.passenger_store
+        i = self._order[self._ptr]
+        k = int(action)
+        origin, dst = store.from_floor[i], store.to_floor[i]
+        up = dst > origin
+        f = self._fidx[origin]
+        row = self._hall[up]
+        row[f] -= 1
+        if not row[f]:
+            self._mv[self._hall_at[up] + f] = 0.0
+
+        weight = store.weight[i]
+        load = b.car_load[k]
+        if not load.fits(weight):
+            store.status[i] = REJECTED
+            reward = -self.reject_penalty
+        else:
+            load.add(weight)
+            b.run_trip(k, origin, ((dst, (i,)),))
+            reward = -(store.board_time[i] - store.appear[i])
+            heapq.heappush(self._onboard[k], (store.alight_time[i], weight))
+            self._load[k] += weight
+            self._mv[self.n_cars + k] = self._load[k] / self._max_weight[k]
+            self._heading[k] = 1.0 if up else -1.0
+            self._mv[k] = self._fidx[dst] * self._floor_norm
+            if self._batch is not None:
+                self._batch[0][k] = b.car_clock[k]
+                self._batch[1][k] = self._heading[k]
+
+        self._ptr += 1
+        self.done = self._ptr >= len(self._order)
+        self._observe()
+        self.episode_reward += reward
+        info = self.info
+        info['passenger'] = i
+        info['time'] = self.now
+        return self.obs, reward, self.done, False, info
+
+    def served(self) -> int:
+        return self.building.passenger_store.count(DONE)
+
+class VecDispatchEnv:
+    '''多栋大楼一起步进；观测为 (环境数, 观测长度) 的数组，结束的环境自动重置'''
+    def __init__(self, buildings: Sequence, **kwargs):
+        np = _np()
+        assert buildings, "至少需要一栋大楼"
+        sizes = {4 * len(b.elevators) + 2 * len(b.floor_range) + 3 for b in buildings}
+        assert len(sizes) == 1, "各大楼的电梯数和楼层数必须相同"
+        self.num_envs = len(buildings)
+        self.obs = np.zeros((self.num_envs, sizes.pop()), dtype=np.float32)
+        self.envs = [DispatchEnv(b, out=self.obs[e], **kwargs) for e, b in enumerate(buildings)]
+        self.n_actions = n = self.envs[0].n_actions
+        # 所有大楼的电梯时钟和方向放在一起，每步用几次NumPy运算算完忙碌时间和方向
+        self.clock = np.zeros((self.num_envs, n))
+        self.heading = np.zeros((self.num_envs, n), dtype=np.float32)
+        self.now = np.zeros((self.num_envs, 1))
+        self._busy = np.zeros((self.num_envs, n))
+        self._moving = np.zeros((self.num_envs, n), dtype=bool)
+        self._scale = np.array([1 / env.time_scale for env in self.envs])[:, None]
+        for e, env in enumerate(self.envs):
+            env._batch = (self.clock[e], self.heading[e])
+        self.rewards = np.zeros(self.num_envs, dtype=np.float64)
+        self.dones = np.zeros(self.num_envs, dtype=bool)
+        self.episode_rewards: List[float] = []  # 已结束各轮的总奖励
+
+    @classmethod
+    def from_topologies(cls, topologies: Sequence, **kwargs) -> VecDispatchEnv:
+        return cls([t.build() for t in topologies], **kwargs)
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _car_features(self):
+        n = self.n_actions
+        busy = self._busy
+        np = _np()
+        np.subtract(self.clock, self.now, out=busy)
+        np.maximum(busy, 0, out=busy)
+        np.multiply(busy, self._scale, out=self.obs[:, 3 * n:4 * n])
+        np.greater(busy, 0, out=self._moving)
+        np.multiply(self.heading, self._moving, out=self.obs[:, 2 * n:3 * n])
+
+    def reset(self):
+        for e, env in enumerate(self.envs):
+            env.reset()
+            self.now[e, 0] = env.now
+        self._car_features()
+        return self.obs
+
+    def step(self, actions):
+        '''`actions` 为每个环境的电梯下标，返回 (观测, 奖励, 结束标记)，数组每步复用'''
+        rewards, dones, now = self.rewards, self.dones, self.now
+        for e, env in enumerate(self.envs):
+            _, rewards[e], dones[e], _, _ = env.step(actions[e])
+            if env.done:
+                self.episode_rewards.append(env.episode_reward)
+                env.reset()
+            now[e, 0] = env.now
+        self._car_features()
+        return self.obs, rewards, dones
+
+def benchmark(env, steps: int = 100_000) -> Dict[str, float]:
+    '''
+    测量步进吞吐量。动作按电梯轮流选择，几乎不占时间，测到的就是环境本身的开销。
+    `env` 可以是 `DispatchEnv` 或 `VecDispatchEnv`（每个环境的一步都算一步）
+    '''
+    np = _np()
+    vec = isinstance(env, VecDispatchEnv)
+    width = env.num_envs if vec else 1
+    n = env.n_actions
+    actions = np.zeros(width, dtype=np.int64)
+    env.reset()
+    rounds = max(steps // width, 1)
+    t0 = time.perf_counter()
+    if vec:
+        for s in range(rounds):
+            actions.fill(s % n)
+            env.step(actions)
+    else:
+        for s in range(rounds):
+            if env.done:
+                env.reset()
+            env.step(s % n)
+    elapsed = time.perf_counter() - t0
+    rate = rounds * width / elapsed
+    return {'steps': rounds * width, 'seconds': elapsed, 'steps_per_second': rate,
+            'us_per_step': 1e6 / rate, 'target': STEP_TARGET}
+
+def main(argv: list[str] = None) -> int:
+    from src.scenario import compile_scenario, load_scenario
+
+    parser = argparse.ArgumentParser(prog='python -m src.rl', description='派梯环境步进吞吐量测试')
+    parser.add_argument('scenario', nargs='?', help='场景文件，不指定时用内置的30层8梯大楼')
+    parser.add_argument('--steps', type=int, default=100_000)
+    parser.add_argument('--envs', type=int, default=1, help='大于1时测VecDispatchEnv')
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        topologies = [load_scenario(args.scenario, seed=s) for s in range(args.envs)]
+    else:
+        topologies = [compile_scenario({
+            'building': {'name': '基准', 'floors': [-2, 30]},
+            'elevators': [{'eid': k, 'speed': 2.5} for k in range(8)],
+            'traffic': {'random': {'seed': s, 'count': 5000, 'duration': 3600}},
+        }) for s in range(args.envs)]
+    if args.envs > 1:
+        env = VecDispatchEnv.from_topologies(topologies)
+    else:
+        env = DispatchEnv.from_topology(topologies[0])
+    r = benchmark(env, args.steps)
+    ok = r['steps_per_second'] >= r['target']
+    print(f"{r['steps']} 步，{r['seconds']:.2f} s，{r['steps_per_second']:,.0f} 步/秒"
+          f"（{r['us_per_step']:.1f} µs/步，目标 {r['target']:,} 步/秒）：{'达标' if ok else '未达标'}")
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+'''场景文件：用JSON/TOML/YAML声明大楼、电梯、客流和调度策略
+
+场景文件编译成不可变的 `Topology`，其中预先算好楼层顺序、累计高度等索引；
+编译结果按文件内容哈希缓存在磁盘上，重复加载同一场景时直接读缓存。
+
+示例（JSON）::
+
+    {
+        "building": {"name": "柳京饭店", "start_time": "2023/01/01 08:00:00",
+                     "floors": [-4, 101], "normal_height": 3.0,
+                     "special_heights": {"1": 5}},
+        "elevators": [{"eid": 0, "name": "左", "speed": 2.5},
+                      {"eid": 1, "name": "右", "speed": 2.5}],
+        "traffic": {"passengers": [{"pid": 1, "from_floor": 1, "to_floor": 5,
+                                    "appear_time": "2023/01/01 08:00:10"}],
+                    "random": {"seed": 42, "count": 100, "duration": 3600}},
+        "capacity": {"max_persons": 13, "door_time": 4, "board_time": 1.2},
+        "strategy": "FCFS"
+    }
+'''
+from __future__ import annotations
+from typing import NamedTuple, Any, Optional
+from bisect import bisect_left
+from types import MappingProxyType
+import hashlib
+import json
+import os
+import pickle
+import random
+
+from src.base import Tool
+
+# 编译格式版本，Topology结构变化时加一，使旧缓存失效
+TOPOLOGY_VERSION = 2
+
+class CarSpec(NamedTuple):
+    '''电梯参数'''
+    eid: int
+    name: str = ''
+    max_weight: int = 1000
+    speed: float = 1.0
+    height: float = 3.0
+    idle_time: float = 300.0
+    max_persons: Optional[int] = None
+    floor_area: Optional[float] = None
+
+class CapacitySpec(NamedTuple):
+    '''容量模型参数，与 `CapacityModel` 的参数相同'''
+    max_persons: Optional[int] = None
+    floor_area: Optional[float] = None
+    person_area: float = 0.2
+    door_time: float = 0.0
+    board_time: float = 0.0
+    alight_time: Optional[float] = None
+
+class PassengerSpec(NamedTuple):
+    '''乘客参数'''
+    pid: int
+    appear_time: str
+    from_floor: int
+    to_floor: int
+    weight: int = 70
+    name: str = ''
+    call_eid: int = 0
+
+class Topology:
+    '''编译后的场景，不可变'''
+    __slots__ = ('name', 'bid', 'start_time', 'normal_height', 'fids', 'heights',
+                 'cum_heights', 'index', 'cars', 'passengers', 'strategy', 'digest', 'capacity')
+
+    def __init__(self, name: str, bid: int, start_time: str, normal_height: float,
+                 fids: tuple[int, ...], heights: tuple[float, ...],
+                 cars: tuple[CarSpec, ...], passengers: tuple[PassengerSpec, ...],
+                 strategy: str = 'FCFS', digest: str = '', capacity: Optional[CapacitySpec] = None):
+        # 索引也存成只读容器，缓存里的Topology不会被意外改写
+        fids, heights = tuple(fids), tuple(heights)
+        cum = [0.0]
+        for h in heights:
+            cum.append(cum[-1] + h)
+        for k, v in (('name', name), ('bid', bid), ('start_time', start_time),
+                     ('normal_height', normal_height), ('fids', fids), ('heights', heights),
+                     ('cum_heights', tuple(cum)),
+                     ('index', MappingProxyType({f: i for i, f in enumerate(fids)})),
+                     ('cars', tuple(cars)), ('passengers', tuple(passengers)), ('strategy', strategy),
+                     ('digest', digest), ('capacity', capacity)):
+            object.__setattr__(self, k, v)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Topology不可修改")
+
+    def __reduce__(self):
+        return (Topology, (self.name, self.bid, self.start_time, self.normal_height,
+                           self.fids, self.heights, self.cars, self.passengers,
+                           self.strategy, self.digest, self.capacity))
+
+    def __repr__(self):
+        return f'Topology(name={self.name}, floors={len(self.fids)}, elevators={len(self.cars)}, passengers={len(self.passengers)})'
+
+    @property
+    def valid_floors(self) -> tuple[int, ...]:
+        '''所有有效楼层（升序，不含0层）'''
+        return self.fids
+
+    def total_height(self, a: int, b: int) -> float:
+        '''与 `Tool.total_height` 结果相同，但只需两次查表'''
+        ia, ib = self.index[a], self.index[b]
+        if ia > ib:
+            ia, ib = ib, ia
+        return self.cum_heights[ib] - self.cum_heights[ia]
+
+    def floor_at_height(self, h: float) -> int:
+        '''返回高度 `h`（从最低层地面算起）所在的楼层'''
+        i = bisect_left(self.cum_heights, h + 1e-9) - 1
+        return self.fids[min(max(i, 0), len(self.fids) - 1)]
+
+    def build(self):
+        '''按场景创建 `Building`（含电梯和乘客）'''
+        from src.elevator import Building, Elevator, Floor
+        from src.capacity import CapacityModel
+
+        building = Building(
+            floor_range=(Floor(self.fids[0]), Floor(self.fids[-1])),
+            start_time=self.start_time,
+            bid=self.bid,
+            name=self.name,
+            normal_height=self.normal_height
+        )
+        for fid, h in zip(self.fids, self.heights):
+            if h != self.normal_height:
+                building.floor_range[fid] = Floor(fid, h)
+        building.elevators = tuple(
+            Elevator(eid=c.eid, name=c.name, max_weight=c.max_weight, building=building,
+                     speed=c.speed, height=c.height, idle_time=c.idle_time,
+                     max_persons=c.max_persons, floor_area=c.floor_area)
+            for c in self.cars
+        )
+        if self.capacity is not None:
+            building.capacity = CapacityModel(**self.capacity._asdict())
+        for p in self.passengers:
+            building.add_passenger_record(p.pid, p.from_floor, p.to_floor, p.appear_time,
+                                          p.weight, p.call_eid, p.name or None)
+        return building
+
+def _random_traffic(spec: dict[str, Any], start_time: str, fids: tuple[int, ...],
+                    eids: list[int], first_pid: int) -> list[PassengerSpec]:
+    '''按种子生成随机客流，同一种子结果相同'''
+    r = random.Random(spec.get('seed', 0))
+    count = spec.get('count', 0)
+    duration = spec.get('duration', 3600)
+    begin = spec.get('start', start_time)
+    w_lo, w_hi = spec.get('weight', (50, 100))
+    lobby = spec.get('lobby', 1)
+    lobby_ratio = spec.get('lobby_ratio', 0.5)
+    offsets = sorted(r.randint(0, duration) for _ in range(count))
+    out = []
+    for k, off in enumerate(offsets):
+        origin = lobby if r.random() < lobby_ratio else r.choice(fids)
+        dst = r.choice(fids)
+        while dst == origin:
+            dst = r.choice(fids)
+        out.append(PassengerSpec(
+            pid=first_pid + k,
+            appear_time=Tool.add_seconds_to_datetime(begin, off),
+            from_floor=origin,
+            to_floor=dst,
+            weight=r.randint(w_lo, w_hi),
+            call_eid=r.choice(eids)
+        ))
+    return out
+
+def compile_scenario(data: dict[str, Any], digest: str = '') -> Topology:
+    '''
+    把场景字典编译成 `Topology`。`digest` 为空时用场景字典的规范JSON计算，
+    内存中构造的不同场景也不会共用结果缓存的键
+    '''
+    if not digest:
+        digest = scenario_digest(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    b = data.get('building', {})
+    lo, hi = b.get('floors', (1, 10))
+    assert lo <= hi, "楼层范围下限不能大于上限"
+    normal_height = float(b.get('normal_height', 3.0))
+    special = {int(k): float(v) for k, v in b.get('special_heights', {}).items()}
+    assert 0 not in special, "楼层范围不能包含0层"
+    fids = tuple(f for f in Tool.myrange(lo, hi) if f != 0)
+    heights = tuple(special.get(f, normal_height) for f in fids)
+    start_time = b.get('start_time', '1970/01/01 00:00:00')
+
+    cars = tuple(CarSpec(**c) for c in data.get('elevators', ()))
+    assert cars, "场景至少需要一部电梯"
+    eids = [c.eid for c in cars]
+    assert len(set(eids)) == len(eids), "电梯eid重复"
+
+    traffic = data.get('traffic', {})
+    passengers = [PassengerSpec(**p) for p in traffic.get('passengers', ())]
+    if 'random' in traffic:
+        first_pid = max((p.pid for p in passengers), default=0) + 1
+        passengers += _random_traffic(traffic['random'], start_time, fids, eids, first_pid)
+    valid = set(fids)
+    for p in passengers:
+        assert p.from_floor in valid and p.to_floor in valid, f"乘客{p.pid}的楼层不在大楼范围内"
+        assert p.call_eid in eids, f"eid {p.call_eid}不存在"
+
+    return Topology(
+        name=b.get('name', ''),
+        bid=b.get('bid', 0),
+        start_time=start_time,
+        normal_height=normal_height,
+        fids=fids,
+        heights=heights,
+        cars=cars,
+        passengers=tuple(passengers),
+        strategy=data.get('strategy', 'FCFS'),
+        digest=digest,
+        capacity=CapacitySpec(**data['capacity']) if 'capacity' in data else None
+    )
+
+def parse_scenario(raw: bytes, fmt: str) -> dict[str, Any]:
+    '''按格式（json/toml/yaml）解析场景文件内容'''
+    match fmt:
+        case 'json':
+            return json.loads(raw)
+        case 'toml':
+            import tomllib
+            return tomllib.loads(raw.decode('utf-8'))
+        case 'yaml' | 'yml':
+            from src.utils.lazy import require
+            return require('yaml', 'YAML场景文件').safe_load(raw)
+        case _:
+            raise ValueError(f"不支持的场景文件格式: {fmt}")
+
+def default_cache_dir(kind: str = 'topology') -> str:
+    '''缓存目录，可用环境变量 WORLDONLINE_CACHE 覆盖；`kind` 为子目录名'''
+    root = os.environ.get('WORLDONLINE_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'worldonline')
+    return os.path.join(root, kind)
+
+def scenario_digest(raw: bytes, seed: int = None) -> str:
+    '''场景内容哈希（含编译格式版本和覆盖用的随机种子）'''
+    salt = b'' if seed is None else b'\0seed=%d' % seed
+    return hashlib.sha256(b'topology-v%d\0' % TOPOLOGY_VERSION + raw + salt).hexdigest()
+
+def load_scenario(path: str, cache_dir: str = None, use_cache: bool = True, seed: int = None) -> Topology:
+    '''
+    读取并编译场景文件；内容没变时直接返回磁盘缓存中的编译结果。
+    `seed` 不为None时覆盖随机客流的种子。
+    '''
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = scenario_digest(raw, seed)
+    cache_file = None
+    if use_cache:
+        cache_dir = cache_dir or default_cache_dir()
+        cache_file = os.path.join(cache_dir, digest + '.pickle')
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    data = parse_scenario(raw, fmt)
+    if seed is not None and 'random' in data.get('traffic', {}):
+        data['traffic']['random']['seed'] = seed
+    topology = compile_scenario(data, digest)
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(topology, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)  # 原子替换，并发进程不会读到半个文件
+    return topology
@@ -0,0 +1,308 @@
+'''时空图导出：把事件流画成“楼层 × 时间”图
+
+横轴是时间，纵轴是楼层：每部电梯的 `elevator_arrive` 连成一条折线，
+每位乘客从上梯（`passenger_board`）到下梯（`passenger_alight`）画一条线段。
+输出SVG/HTML（浏览器直接打开）或Chrome trace事件JSON（chrome://tracing、Perfetto）。
+
+输入是按时间排序的事件流：`execute` 的返回值、`src.replay.read_log` 读出的规范记录，
+或 `ResultCache` 保存的压缩日志都可以。写出时边读边写，内存只与电梯数、
+当前在梯乘客数和一个时间分辨率内的数据量有关：
+
+- 时间按 `resolution` 秒分段，每部电梯每段最多保留 首/最低/最高/末 四个点
+- 同一电梯、同一上下梯时间段、同样起止楼层的乘客合并成一条线段，线宽表示人数；
+  每部电梯每个时间段最多画 `max_segments` 条乘客线段，多出的人数计入已画的线段
+
+命令行::
+
+    python -m src.spacetime 场景.json -o 时空图.html [--log current.jsonl] [--resolution 5]
+'''
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import argparse
+import html
+import json
+import math
+import os
+import sys
+
+from src.replay import canonical
+
+FORMATS = ('svg', 'html', 'trace')
+
+# 电梯配色，按eid循环使用
+PALETTE = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+           '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf')
+
+class _CarPath:
+    '''一部电梯的降采样轨迹'''
+    __slots__ = ('bin', 'points', 'chunk')
+
+    def __init__(self):
+        self.bin = None
+        self.points: List[tuple[float, int]] = []  # 当前时间段内的(时间, 楼层下标)
+        self.chunk: List[tuple[float, int]] = []   # 已降采样、待写出的点
+
+    def reduce(self) -> List[tuple[float, int]]:
+        '''当前时间段的点降采样为按时间排列的 首/最低/最高/末'''
+        pts = self.points
+        if len(pts) <= 4:
+            return pts
+        keep = {0, len(pts) - 1,
+                min(range(len(pts)), key=lambda j: pts[j][1]),
+                max(range(len(pts)), key=lambda j: pts[j][1])}
+        return [pts[j] for j in sorted(keep)]
+
+class SpaceTimeWriter:
+    '''
+    流式写出时空图。`fids` 为全部楼层（升序，如 `Topology.fids`），
+    `resolution` 为降采样的时间分辨率（秒，SVG中一个像素）
+    '''
+    CHUNK = 256  # SVG折线每段的点数
+
+    def __init__(self,
+                 path: str,
+                 fids: Sequence[int],
+                 fmt: str = None,
+                 resolution: float = 1.0,
+                 floor_px: float = None,
+                 title: str = '',
+                 max_segments: int = 2
+                 ):
+        fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        fmt = 'trace' if fmt == 'json' else fmt
+        assert fmt in FORMATS, f"不支持的格式: {fmt}"
+        assert resolution > 0, "时间分辨率必须大于0"
+        assert max_segments >= 1, "每段至少画一条乘客线段"
+        self.fmt = fmt
+        self.resolution = resolution
+        self.index = {f: i for i, f in enumerate(fids)}
+        self.fids = tuple(fids)
+        # 楼层多时压缩行高，让整张图不超过约1200像素高
+        self.floor_px = floor_px or max(1.0, min(8.0, 1200 / max(len(fids), 1)))
+        self.title = html.escape(title)
+        self.margin = (50, 20, 30, 20)  # 左、上、下、右
+        self.cars: Dict[int, _CarPath] = {}
+        self.boarded: Dict[int, tuple[float, int, int]] = {}  # pid -> (上梯时间, 楼层下标, eid)
+        self.max_segments = max_segments
+        self.segments: Dict[tuple, int] = {}  # 当前时间段内合并中的乘客线段 -> 人数
+        self._car_segments: Dict[int, tuple] = {}  # eid -> 当前时间段内最后画的线段
+        self._car_counts: Dict[int, int] = {}
+        self.seg_bin = None
+        self.last_time = 0.0
+        self.next_tick = 0.0
+        self.tick = None
+        self.count = 0    # 写入的相关事件数
+        self._ids = 0     # trace异步事件编号
+        self._f = open(path, 'w', encoding='utf-8')
+        self._first_trace = True
+        self._header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 输入 ----------
+    def write(self, events: Iterable):
+        for event in events:
+            self.feed(event)
+
+    def feed(self, event):
+        '''写入一个事件（事件字典或规范记录 [类型, 时间, eid, pid, fid]）'''
+        if isinstance(event, dict):
+            event = canonical(event)
+        event_type, t, eid, pid, fid = event
+        if event_type not in ('elevator_arrive', 'passenger_board', 'passenger_alight'):
+            return
+        self.count += 1
+        if t > self.last_time:
+            self.last_time = t
+            if self.fmt != 'trace':
+                self._ticks(t)
+        match event_type:
+            case 'elevator_arrive':
+                self._arrive(eid, t, self.index[fid])
+            case 'passenger_board':
+                self.boarded[pid] = (t, self.index[fid], eid)
+            case 'passenger_alight':
+                start = self.boarded.pop(pid, None)
+                if start is not None:
+                    self._segment(start, t, self.index[fid])
+
+    def _arrive(self, eid: int, t: float, y: int):
+        car = self.cars.get(eid)
+        if car is None:
+            car = self.cars[eid] = _CarPath()
+            if self.fmt == 'trace':
+                self._trace({'ph': 'M', 'name': 'thread_name', 'pid': 1, 'tid': eid,
+                             'args': {'name': f'电梯{eid}'}})
+        b = int(t // self.resolution)
+        if car.bin is not None and b != car.bin:
+            self._flush_car(eid, car)
+        car.bin = b
+        car.points.append((t, y))
+
+    def _flush_car(self, eid: int, car: _CarPath, final: bool = False):
+        pts = car.reduce()
+        car.points = []
+        if self.fmt == 'trace':
+            # 计数器事件数量最多，直接拼字符串，不走json.dumps
+            for t, y in pts:
+                self._f.write(f',\n{{"ph":"C","name":"电梯{eid}楼层","pid":1,"tid":{eid},'
+                              f'"ts":{round(t * 1e6)},"args":{{"floor":{self.fids[y]}}}}}')
+            return
+        car.chunk.extend(pts)
+        if len(car.chunk) >= self.CHUNK or (final and len(car.chunk) > 1):
+            self._polyline(eid, car.chunk)
+            car.chunk = car.chunk[-1:]  # 下一段从这里接上
+
+    def _segment(self, start: tuple[float, int, int], t: float, y: int):
+        t0, y0, eid = start
+        b = int(t // self.resolution)
+        if self.seg_bin is not None and b != self.seg_bin:
+            self._flush_segments()
+        self.seg_bin = b
+        key = (eid, int(t0 // self.resolution), y0, b, y)
+        if key not in self.segments:
+            if self._car_counts.get(eid, 0) >= self.max_segments:
+                key = self._car_segments[eid]
+            else:
+                self._car_counts[eid] = self._car_counts.get(eid, 0) + 1
+                self._car_segments[eid] = key
+                self.segments[key] = 0
+        self.segments[key] += 1
+
+    def _flush_segments(self):
+        r = self.resolution
+        for (eid, b0, y0, b1, y1), n in self.segments.items():
+            if self.fmt == 'trace':
+                # 异步事件可以互相重叠，同一电梯上的乘客画在同一行
+                name = f'{self.fids[y0]}→{self.fids[y1]}' + (f' ×{n}' if n > 1 else '')
+                common = {'cat': 'passenger', 'name': name, 'pid': 2, 'tid': eid, 'id': self._ids}
+                self._ids += 1
+                self._trace(dict(common, ph='b', ts=round(b0 * r * 1e6), args={'passengers': n}))
+                self._trace(dict(common, ph='e', ts=round(b1 * r * 1e6)))
+            else:
+                width = 0.6 + math.log2(n) * 0.6
+                self._f.write(f'<line class="p c{eid % len(PALETTE)}" x1="{self._x(b0 * r)}" y1="{self._y(y0)}" '
+                              f'x2="{self._x(b1 * r)}" y2="{self._y(y1)}" stroke-width="{width:.2f}"/>\n')
+        self.segments = {}
+        self._car_segments = {}
+        self._car_counts = {}
+
+    # ---------- 输出 ----------
+    def _x(self, t: float) -> str:
+        return f'{self.margin[0] + t / self.resolution:.1f}'
+
+    def _y(self, y: int) -> str:
+        return f'{self.margin[1] + (len(self.fids) - 1 - y) * self.floor_px:.1f}'
+
+    def _trace(self, rec: Dict[str, Any]):
+        self._f.write(('' if self._first_trace else ',\n') + json.dumps(rec, ensure_ascii=False))
+        self._first_trace = False
+
+    def _polyline(self, eid: int, pts: List[tuple[float, int]]):
+        points = ' '.join(f'{self._x(t)},{self._y(y)}' for t, y in pts)
+        self._f.write(f'<polyline class="car c{eid % len(PALETTE)}" points="{points}"/>\n')
+
+    def _ticks(self, t: float):
+        '''时间刻度线随时间推进写出（刻度间隔约100像素，取整到分钟）'''
+        if self.tick is None:
+            self.tick = max(60, math.ceil(100 * self.resolution / 60) * 60)
+        top, bottom = self._y(len(self.fids) - 1), self._y(0)
+        while self.next_tick <= t:
+            x = self._x(self.next_tick)
+            minutes = int(self.next_tick // 60)
+            self._f.write(f'<line class="grid" x1="{x}" y1="{top}" x2="{x}" y2="{bottom}"/>'
+                          f'<text class="axis" x="{x}" y="{float(bottom) + 16:.1f}" text-anchor="middle">'
+                          f'{minutes // 60}:{minutes % 60:02d}</text>\n')
+            self.next_tick += self.tick
+
+    def _header(self):
+        if self.fmt == 'trace':
+            self._f.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+            self._trace({'ph': 'M', 'name': 'process_name', 'pid': 1, 'args': {'name': '电梯楼层'}})
+            self._trace({'ph': 'M', 'name': 'process_name', 'pid': 2, 'args': {'name': '乘客'}})
+            return
+        height = self.margin[1] + (len(self.fids) - 1) * self.floor_px + self.margin[2]
+        if self.fmt == 'html':
+            self._f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+                          f'<title>{self.title or "时空图"}</title></head>\n'
+                          '<body style="margin:0;overflow:auto">\n')
+        # 总时长写完才知道，宽度先留空位，结束时回填
+        self._f.write('<svg xmlns="http://www.w3.org/2000/svg" ')
+        self._width_pos = self._f.tell()
+        self._f.write(f'{"":20} height="{height:.0f}">\n')
+        style = ''.join(f'.c{k}{{stroke:{c}}}' for k, c in enumerate(PALETTE))
+        self._f.write('<style>polyline{fill:none;stroke-width:1.2}line.p{stroke-opacity:.35}'
+                      '.grid{stroke:#ddd;stroke-width:.5}.axis{font:10px sans-serif;fill:#555}'
+                      f'{style}</style>\n')
+        if self.title:
+            self._f.write(f'<text class="axis" x="{self.margin[0]}" y="12">{self.title}</text>\n')
+        # 楼层刻度：大约每20像素一个
+        step = max(1, math.ceil(20 / self.floor_px))
+        for y in range(0, len(self.fids), step):
+            self._f.write(f'<text class="axis" x="{self.margin[0] - 6}" y="{float(self._y(y)) + 3:.1f}" '
+                          f'text-anchor="end">{self.fids[y]}</text>\n')
+
+    def close(self):
+        if self._f.closed:
+            return
+        for eid, car in self.cars.items():
+            self._flush_car(eid, car, final=True)
+        self._flush_segments()
+        if self.fmt == 'trace':
+            self._f.write('\n]}\n')
+        else:
+            self._f.write('</svg>\n')
+            if self.fmt == 'html':
+                self._f.write('</body></html>\n')
+            width = f'{self.margin[0] + self.last_time / self.resolution + self.margin[3]:.0f}'
+            self._f.seek(self._width_pos)
+            self._f.write(f'width="{width}"'.ljust(20))
+        self._f.close()
+
+def export_spacetime(events: Iterable,
+                     path: str,
+                     fids: Sequence[int],
+                     fmt: str = None,
+                     resolution: float = None,
+                     duration: Optional[float] = None,
+                     title: str = '',
+                     max_segments: int = 2
+                     ) -> str:
+    '''
+    把事件流写成时空图。不指定 `resolution` 时，按 `duration`（秒）把图宽限制在约4000像素，
+    两者都没有时取1秒
+    '''
+    if resolution is None:
+        resolution = max(1.0, duration / 4000) if duration else 1.0
+    with SpaceTimeWriter(path, fids, fmt, resolution, title=title, max_segments=max_segments) as writer:
+        writer.write(events)
+    return path
+
+def main(argv: list[str] = None) -> int:
+    from src.scenario import load_scenario
+
+    parser = argparse.ArgumentParser(prog='python -m src.spacetime', description='导出电梯时空图')
+    parser.add_argument('scenario', help='场景文件（提供楼层信息；没有 --log 时直接运行）')
+    parser.add_argument('-o', '--out', required=True, help='输出文件（.svg/.html/.json）')
+    parser.add_argument('--log', help='`python -m src.replay record` 写出的事件日志')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--resolution', type=float, help='时间分辨率（秒）')
+    args = parser.parse_args(argv)
+
+    topology = load_scenario(args.scenario, seed=args.seed)
+    if args.log:
+        from src.replay import read_log
+        events = read_log(args.log)
+    else:
+        events = topology.build().execute(topology.strategy)
+    export_spacetime(events, args.out, topology.fids, args.format, args.resolution, title=topology.name)
+    print(args.out)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
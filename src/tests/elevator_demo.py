@@ -1,7 +1,9 @@
-from typing import Generator
-
+import heapq, itertools
 import pprint
 
+from src.elevator import Building, Elevator, Passenger, Floor
+from src.utils.translate import ElevatorTranslate as Translate
+
 def demo():
     heap = []
     counter = itertools.count()
@@ -44,9 +46,4 @@ def demo():
         
 
 if __name__ == "__main__":
-    from core import *
-    from translate import *
     demo()
-else:
-    from .core import *
-    from .translate import *
\ No newline at end of file
@@ -1,4 +1,8 @@
-import random
+import heapq, itertools
+import random, time
+
+from src.elevator import Building, Elevator, Passenger, Floor
+from src.utils.translate import ElevatorTranslate as Translate
 
 def demo():
     heap = []
@@ -47,9 +51,4 @@ def demo():
         Translate(event)
 
 if __name__ == "__main__":
-    from core import *
-    from translate import *
     demo()
-else:
-    from .core import *
-    from .translate import *
\ No newline at end of file
@@ -0,0 +1,28 @@
+'''结果缓存的回归测试，运行：python -m pytest src/tests'''
+import pytest
+
+from src.cache import ResultCache
+from src.scenario import Topology, compile_scenario
+
+def scenario(seed: int) -> dict:
+    return {"building": {"name": "t", "start_time": "2023/01/01 08:00:00", "floors": [1, 10]},
+            "elevators": [{"eid": 0}, {"eid": 1}],
+            "traffic": {"random": {"seed": seed, "count": 20, "duration": 300}}}
+
+def test_unhashed_topologies_do_not_share_results(tmp_path):
+    '''没有给哈希、在内存中编译的两个不同场景不能命中对方的缓存'''
+    a, b = compile_scenario(scenario(1)), compile_scenario(scenario(2))
+    assert a.digest and b.digest and a.digest != b.digest
+    assert compile_scenario(scenario(1)).digest == a.digest
+    cache = ResultCache(str(tmp_path))
+    ra, rb = cache.run(a), cache.run(b)
+    assert not ra.hit and not rb.hit
+    assert ra.key != rb.key and ra.fingerprint != rb.fingerprint
+    assert cache.run(a).hit
+
+def test_empty_digest_is_refused():
+    t = compile_scenario(scenario(1))
+    bare = Topology(t.name, t.bid, t.start_time, t.normal_height, t.fids, t.heights,
+                    t.cars, t.passengers, t.strategy, '', t.capacity)
+    with pytest.raises(AssertionError):
+        ResultCache.key(bare)
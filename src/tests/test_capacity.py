@@ -0,0 +1,16 @@
+'''容量模型的回归测试，运行：python -m pytest src/tests'''
+from src.capacity import CapacityModel
+from src.elevator import Building, Elevator, Floor, Passenger
+
+def test_person_limit_is_computed_once(monkeypatch):
+    '''上客时直接用缓存的人数上限；换容量模型后 `reset_cars` 重算'''
+    b = Building(floor_range=(Floor(1), Floor(10)), start_time='2023/01/01 08:00:00')
+    b.elevators = (Elevator(eid=0, building=b),)
+    b.capacity = CapacityModel(max_persons=2)
+    b.reset_cars()
+    calls = []
+    monkeypatch.setattr(CapacityModel, 'person_limit', lambda self, elevator: calls.append(elevator))
+    elevator = b.elevators[0]
+    riders = [Passenger(pid=k, weight=70, building=b, appear_time='2023/01/01 08:00:00') for k in range(3)]
+    assert [elevator.add_passenger(p) for p in riders] == [True, True, False]
+    assert calls == []
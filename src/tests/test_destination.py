@@ -0,0 +1,59 @@
+'''目的层派梯（DEST）的回归测试，运行：python -m pytest src/tests'''
+from src.elevator import Building, Elevator, Floor
+from src.passengers import DONE
+from src.scenario import compile_scenario
+
+def make_building(*max_weights: int) -> Building:
+    building = Building(floor_range=(Floor(1), Floor(20)), start_time='2023/01/01 08:00:00')
+    building.elevators = tuple(Elevator(eid=k, max_weight=w, building=building)
+                               for k, w in enumerate(max_weights))
+    return building
+
+def boarded_by(events) -> dict[int, int]:
+    counts: dict[int, int] = {}
+    for e in events:
+        if e['event_type'] == 'passenger_board':
+            counts[e['elevator'].eid] = counts.get(e['elevator'].eid, 0) + 1
+    return counts
+
+def kpis(method: str, lobby_ratio: float) -> tuple[float, int, int]:
+    '''返回 (平均候梯时间, 电梯运行的总层数, 最后一位乘客到达的时间)'''
+    spec = {"building": {"name": "t", "start_time": "2023/01/01 08:00:00", "floors": [1, 20]},
+            "elevators": [{"eid": e} for e in range(4)],
+            "traffic": {"random": {"seed": 1, "count": 1000, "duration": 3600, "lobby_ratio": lobby_ratio}}}
+    b = compile_scenario(spec).build()
+    events = b.execute(method)
+    last: dict[int, int] = {}
+    floors = 0
+    for e in events:
+        if e['event_type'] == 'elevator_arrive':
+            eid, fid = e['elevator'].eid, e['floor'].fid
+            floors += abs(fid - last.get(eid, fid))
+            last[eid] = fid
+    store = b.passenger_store
+    done = [i for i in range(len(store)) if store.status[i] == DONE]
+    assert len(done) == len(store)
+    wait = sum(store.board_time[i] - store.appear[i] for i in done) / len(done)
+    return wait, floors, max(store.alight_time[i] for i in done)
+
+def test_bucket_goes_to_one_car():
+    '''同一出发层同方向的乘客只要装得下就坐同一趟，不拆给几部电梯'''
+    b = make_building(1000, 1000, 1000, 1000)
+    for pid in range(6):
+        b.add_passenger_record(pid, 10, 11 + pid, pid, 70)  # 都在最近的电梯到达10层之前呼梯
+    events = b.execute('DEST')
+    assert list(boarded_by(events).values()) == [6]
+    assert len(set(b.passenger_store.board_time)) == 1
+
+def test_bucket_split_only_by_capacity():
+    b = make_building(1000, 1000, 1000, 1000)
+    for pid in range(3):
+        b.add_passenger_record(pid, 1, 10, 0, 400)
+    events = b.execute('DEST')
+    assert sorted(boarded_by(events).values()) == [1, 2]
+
+def test_dest_not_worse_than_queue():
+    '''高峰和混合客流下，目的层派梯的候梯时间、运行层数和完成时间都不比排队模式差'''
+    for lobby_ratio in (0.5, 1.0):
+        dest, queue = kpis('DEST', lobby_ratio), kpis('QUEUE', lobby_ratio)
+        assert all(d <= q for d, q in zip(dest, queue)), (lobby_ratio, dest, queue)
@@ -0,0 +1,34 @@
+'''停运（故障/维保）的回归测试，运行：python -m pytest src/tests'''
+from src.elevator import Building, Elevator, Floor
+
+def make_building() -> Building:
+    building = Building(floor_range=(Floor(1), Floor(10)), start_time='2023/01/01 08:00:00')
+    building.elevators = (Elevator(eid=0, building=building), Elevator(eid=1, building=building))
+    return building
+
+def boarded_car(events, pid: int) -> int:
+    return next(e['elevator'].eid for e in events
+                if e['event_type'] == 'passenger_board' and e['passenger'].pid == pid)
+
+def test_fcfs_reassignment_is_repeatable():
+    '''FCFS改派只影响本次模拟，不改写乘客呼叫的电梯'''
+    b = make_building()
+    b.add_passenger_record(0, 1, 5, 10, call_eid=0)
+    b.outages.add_maintenance(0, 0, 600)
+    assert boarded_car(b.execute('FCFS'), 0) == 1
+    assert b.passenger_store.call_eid[0] == 0
+    b.outages.clear()
+    assert boarded_car(b.execute('FCFS'), 0) == 0
+
+def test_overlapping_outages_emit_one_window():
+    '''同一电梯重叠的停运合并成一段，恢复事件在合并后的结束时间'''
+    b = make_building()
+    b.outages.add_maintenance(0, 100, 100)  # [100, 200)
+    b.outages.add(0, 150, 300, 'fault')     # [150, 300)
+    b.outages.add(1, 50, 80, 'fault')
+    events = [(e['event_type'], e['elevator'].eid, e['relative_time']) for e in b.execute('FCFS')
+              if e['event_type'] in ('elevator_fault', 'elevator_maintenance', 'elevator_restore')]
+    assert events == [('elevator_fault', 1, 50), ('elevator_restore', 1, 80),
+                      ('elevator_maintenance', 0, 100), ('elevator_restore', 0, 300)]
+    for _, eid, t in events[1::2]:
+        assert b.outages.in_service(eid, t)
@@ -0,0 +1,48 @@
+'''排队模式（QUEUE）的回归测试，运行：python -m pytest src/tests'''
+from src.elevator import Building, Elevator, Floor
+
+def make_building(*max_weights: int) -> Building:
+    building = Building(floor_range=(Floor(1), Floor(10)), start_time='2023/01/01 08:00:00')
+    building.elevators = tuple(Elevator(eid=k, max_weight=w, building=building)
+                               for k, w in enumerate(max_weights))
+    return building
+
+def boarded_by(events) -> dict[int, int]:
+    counts: dict[int, int] = {}
+    for e in events:
+        if e['event_type'] == 'passenger_board':
+            counts[e['elevator'].eid] = counts.get(e['elevator'].eid, 0) + 1
+    return counts
+
+def test_heavy_head_does_not_idle_smaller_car():
+    '''小电梯载不动队首的重乘客时，仍要接后面载得动的乘客，而不是从此不再出动'''
+    b = make_building(500, 1000)
+    b.add_passenger_record(0, 1, 5, 0, 600)
+    for pid in range(1, 11):
+        b.add_passenger_record(pid, 1, 5 + pid % 4, 0, 70)
+    events = b.execute('QUEUE')
+    counts = boarded_by(events)
+    assert counts == {0: 7, 1: 4}
+    # 重乘客由大电梯接走；没有人要等大电梯跑第二趟
+    heavy = next(e for e in events if e['event_type'] == 'passenger_board' and e['passenger'].pid == 0)
+    assert heavy['elevator'].eid == 1
+    assert max(b.passenger_store.board_time) == b.passenger_store.board_time[0]
+
+def test_idle_car_wakes_for_later_arrival():
+    '''没有能接的乘客而空等的电梯，在下一位乘客到达时重新参与派梯'''
+    b = make_building(500, 1000)
+    b.add_passenger_record(0, 1, 10, 0, 600)  # 只有大电梯载得动
+    b.add_passenger_record(1, 1, 2, 5, 70)    # 大电梯还在路上，小电梯来接
+    events = b.execute('QUEUE')
+    board = {e['passenger'].pid: e['elevator'].eid for e in events if e['event_type'] == 'passenger_board'}
+    assert board == {0: 1, 1: 0}
+    assert b.passenger_store.board_time[1] == 5
+
+def test_rider_too_heavy_for_every_car_is_rejected():
+    b = make_building(500, 1000)
+    b.add_passenger_record(0, 1, 5, 0, 1200)
+    b.add_passenger_record(1, 1, 5, 0, 70)
+    events = b.execute('QUEUE')
+    types = [e['event_type'] for e in events]
+    assert types.count('elevator_outweight') == 1
+    assert types.count('passenger_board') == 1
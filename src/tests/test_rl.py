@@ -0,0 +1,55 @@
+'''强化学习派梯环境的回归测试，运行：python -m pytest src/tests'''
+import pytest
+
+from src.scenario import compile_scenario
+
+pytest.importorskip('numpy')
+
+from src.rl import DispatchEnv
+
+def make_topology():
+    return compile_scenario({
+        'building': {'name': 't', 'floors': [1, 10]},
+        'elevators': [{'eid': 0}, {'eid': 1}],
+        'traffic': {'random': {'seed': 1, 'count': 20, 'duration': 600}},
+    })
+
+def test_close_restores_building_events():
+    '''包装过的大楼在close()之后，execute返回的事件与包装前相同'''
+    building = make_topology().build()
+    before = len(building.execute('FCFS'))
+    assert before
+    env = DispatchEnv(building)
+    env.reset()
+    while not env.done:
+        env.step(0)
+    assert building.execute('FCFS') == []
+    env.close()
+    env.close()
+    assert len(building.execute('FCFS')) == before
+
+def test_env_does_not_rewrite_called_cars():
+    building = make_topology().build()
+    called = list(building.passenger_store.call_eid)
+    with DispatchEnv(building) as env:
+        env.reset()
+        while not env.done:
+            env.step(1)
+    assert list(building.passenger_store.call_eid) == called
+
+def test_hall_bitmap_shows_only_registered_calls():
+    '''默认不前瞻：候梯位图只含已呼梯、尚未派梯的乘客，不泄露未来的呼梯'''
+    from src.passengers import WAITING
+
+    building = make_topology().build()
+    store = building.passenger_store
+    index = building.floor_range.index
+    with DispatchEnv(building) as env:
+        env.reset()
+        while not env.done:
+            waiting = {(index(store.from_floor[i]), store.to_floor[i] > store.from_floor[i])
+                       for i in range(len(store)) if store.status[i] == WAITING and store.appear[i] <= env.now}
+            shown = {(f, up) for up, row in ((True, env.obs_hall_up), (False, env.obs_hall_down))
+                     for f in range(env.n_floors) if row[f]}
+            assert shown == waiting
+            env.step(0)
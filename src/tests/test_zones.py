@@ -0,0 +1,21 @@
+'''分区并行模拟的回归测试，运行：python -m pytest src/tests'''
+from src.scenario import compile_scenario
+from src.zones import Zone, run_zoned
+
+def test_car_rides_do_not_overlap():
+    '''同一部电梯跑完上一趟才接下一位乘客'''
+    spec = {"building": {"name": "t", "start_time": "2023/01/01 08:00:00", "floors": [1, 40]},
+            "elevators": [{"eid": e, "speed": 2.5} for e in range(4)],
+            "traffic": {"random": {"seed": 3, "count": 600, "duration": 600}}}
+    zones = [Zone('low', 1, 20, (0, 1)), Zone('high', 20, 40, (2, 3))]
+    events = run_zoned(compile_scenario(spec), zones, processes=False)
+    boarded, rides = {}, {}
+    for e in events:
+        if e.event_type == 'passenger_board':
+            boarded[(e.zone, e.pid)] = e.relative_time
+        elif e.event_type == 'passenger_alight':
+            rides.setdefault(e.eid, []).append((boarded.pop((e.zone, e.pid)), e.relative_time))
+    assert sum(map(len, rides.values())) >= 600
+    for trips in rides.values():
+        trips.sort()
+        assert all(nxt[0] >= prev[1] for prev, nxt in zip(trips, trips[1:]))
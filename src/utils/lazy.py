@@ -0,0 +1,25 @@
+'''可选重依赖（NumPy、pandas等）的按需导入'''
+from __future__ import annotations
+import importlib
+
+_loaded: dict[str, object] = {}
+
+def require(module: str, feature: str = ''):
+    '''首次调用时导入 `module` 并缓存；未安装时抛出带说明的ImportError'''
+    mod = _loaded.get(module)
+    if mod is None:
+        try:
+            mod = importlib.import_module(module)
+        except ImportError as e:
+            hint = f"（{feature}需要）" if feature else ''
+            raise ImportError(f"缺少可选依赖 {module}{hint}，请先 pip install {module}") from e
+        _loaded[module] = mod
+    return mod
+
+def is_available(module: str) -> bool:
+    '''判断可选依赖是否可用，不会把失败结果缓存'''
+    try:
+        require(module)
+    except ImportError:
+        return False
+    return True
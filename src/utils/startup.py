@@ -0,0 +1,48 @@
+'''冷启动耗时测量
+
+每次测量都启动新的解释器进程，结果减去空解释器的启动时间，
+得到的就是导入本包带来的额外开销。默认测量CLI工作进程真正会走的导入路径
+（包本身、模拟核心和事件翻译），而不是只导入 `sys` 的入口脚本。
+'''
+from __future__ import annotations
+from typing import Sequence
+import statistics
+import subprocess
+import sys
+import time
+
+# 导入开销预算（毫秒），不含解释器本身的启动时间
+COLD_START_BUDGET_MS = 40.0
+
+# 工作进程的导入路径
+WORKER_MODULES = ('src', 'src.elevator', 'src.utils.translate')
+
+def _spawn_ms(code: str) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, '-S', '-c', code], check=True)
+    return (time.perf_counter() - t0) * 1000
+
+def measure_cold_start(targets: Sequence[str] = WORKER_MODULES, runs: int = 5) -> dict[str, float]:
+    '''测量依次导入 `targets` 的冷启动耗时，取中位数'''
+    if isinstance(targets, str):
+        targets = (targets,)
+    # -S 跳过site，避免用户环境的.pth文件影响结果；sys.path由调用方当前目录提供
+    code = f"import sys; sys.path.insert(0, {sys.path[0] or '.'!r}); import {', '.join(targets)}"
+    base = statistics.median(_spawn_ms('pass') for _ in range(runs))
+    total = statistics.median(_spawn_ms(code) for _ in range(runs))
+    return {
+        'interpreter_ms': base,
+        'total_ms': total,
+        'import_ms': max(total - base, 0.0),
+        'budget_ms': COLD_START_BUDGET_MS,
+    }
+
+def report_cold_start(targets: Sequence[str] = WORKER_MODULES, runs: int = 5) -> bool:
+    '''打印冷启动耗时，返回是否在预算内'''
+    if isinstance(targets, str):
+        targets = (targets,)
+    r = measure_cold_start(targets, runs)
+    ok = r['import_ms'] <= r['budget_ms']
+    print(f"解释器启动 {r['interpreter_ms']:.1f} ms，导入 {', '.join(targets)} {r['import_ms']:.1f} ms"
+          f"（预算 {r['budget_ms']:.0f} ms）：{'通过' if ok else '超出预算'}")
+    return ok
@@ -1,7 +1,4 @@
-try:
-    from src.core import Building,Elevator,Passenger,Floor,Tool
-except:
-    from ..Building.Elevator.core import Building,Elevator,Passenger,Floor,Tool
+from src.elevator import Building,Elevator,Passenger,Floor,Tool
 
 class ElevatorTranslate:
     def __init__(self, event:dict[str, str|int|Building|Elevator|Passenger|Floor]):
@@ -20,6 +17,8 @@ class ElevatorTranslate:
                 print(f"[{time_}] 电梯 {elevator_.name}(eid: {elevator_.eid}) 空闲")
             case 'elevator_arrive':
                 print(f"[{time_}] 电梯 {elevator_.name}(eid: {elevator_.eid}) 到达 {floor_.fid} 层（平均速度：{elevator_.speed} m/s）")
+            case 'call_elevator' if elevator_ is None:
+                print(f"[{time_}] 乘客 {passenger_.name}(pid: {passenger_.pid}) 在楼层 {floor_.fid} 呼叫电梯，目标楼层 {passenger_.to_floor}，质量 {passenger_.weight}kg")
             case 'call_elevator':
                 print(f"[{time_}] 乘客 {passenger_.name}(pid: {passenger_.pid}) 在楼层 {floor_.fid} 呼叫电梯 {elevator_.name}(eid: {elevator_.eid})（计划），目标楼层 {passenger_.to_floor}，质量 {passenger_.weight}kg")
             case 'passenger_board':
@@ -28,6 +27,16 @@ class ElevatorTranslate:
                 print(f"[{time_}] 乘客 {passenger_.name}(pid: {passenger_.pid}) 下电梯 {elevator_.name}(eid: {elevator_.eid})，到达楼层 {passenger_.to_floor}")
             case 'elevator_outweight':
                 print(f"[{time_}] 电梯 {elevator_.name}(eid: {elevator_.eid}) 超载！最大载重 {elevator_.max_weight}kg，乘客{passenger_.name}(pid: {passenger_.pid})无法上电梯")
+            case 'passenger_balk':
+                print(f"[{time_}] 楼层 {floor_.fid} 候梯人数已满，乘客 {passenger_.name}(pid: {passenger_.pid}) 离开")
+            case 'passenger_renege':
+                print(f"[{time_}] 乘客 {passenger_.name}(pid: {passenger_.pid}) 在楼层 {floor_.fid} 等待太久，放弃乘梯")
+            case 'elevator_fault':
+                print(f"[{time_}] 电梯 {elevator_.name}(eid: {elevator_.eid}) 故障，停止服务")
+            case 'elevator_maintenance':
+                print(f"[{time_}] 电梯 {elevator_.name}(eid: {elevator_.eid}) 开始维保，停止服务")
+            case 'elevator_restore':
+                print(f"[{time_}] 电梯 {elevator_.name}(eid: {elevator_.eid}) 恢复服务")
             case 'end':
                 print(f"[{time_}] {building_.name}(bid: {building_.bid})模拟结束，共计运行 {Tool.time_difference_seconds(building_.start_time, time_)} 秒")
             case 'invalid':
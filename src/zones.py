@@ -0,0 +1,235 @@
+'''按电梯分区（低区/中区/高区）把一次大模拟拆到多个进程
+
+超高层大楼的电梯分成几组，各自服务一段楼层，组与组之间在空中大堂换乘。
+每个分区的电梯和乘客在单独的工作进程里模拟；跨区乘客在空中大堂下梯后，
+作为带时间戳的换乘消息交给下一个分区，换乘步行时间 `transfer_time` 就是前瞻量：
+
+- 主进程每轮取所有分区最早的待处理时间T，让各分区并行处理出现时间在[T, T+L)内的乘客
+- 这一轮产生的换乘乘客最早在T+L出现，不会落进任何分区已经处理过的时间段（保守同步）
+- 空闲的时间段直接跳过，不必逐窗口空转
+
+分区内每位乘客由ETA最小、载得动的电梯单独跑一趟（`Building.run_trip`，电梯跑完上一趟才出发）。
+结束后各分区事件按时间归并。
+'''
+from __future__ import annotations
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import heapq
+import multiprocessing
+
+from src.base import Tool
+from src.passengers import DONE, REJECTED
+from src.scenario import Topology
+
+class Zone(NamedTuple):
+    '''电梯分区：服务 lowest ~ highest 层（相邻分区在空中大堂共用一层）'''
+    name: str
+    lowest: int
+    highest: int
+    eids: tuple[int, ...]
+
+class ZoneEvent(NamedTuple):
+    '''分区模拟的事件记录（不含对象，便于跨进程传递）'''
+    relative_time: float
+    zone: str
+    event_type: str
+    eid: Optional[int]
+    pid: Optional[int]
+    fid: Optional[int]
+
+# 换乘行程：(pid, 出现时间, 出发层, 目的层, 体重, 后续行程)
+Leg = tuple
+
+def plan_legs(zones: Sequence[Zone], from_floor: int, to_floor: int) -> List[tuple[int, int, int]]:
+    '''把一次乘梯拆成若干段 (分区下标, 出发层, 目的层)'''
+    up = to_floor >= from_floor
+
+    def zone_of(fid: int, upper: bool) -> int:
+        # 空中大堂同属上下两区：向上出发/向下到达取上区，反之取下区
+        found = [z for z, zone in enumerate(zones) if zone.lowest <= fid <= zone.highest]
+        assert found, f"楼层{fid}不属于任何分区"
+        return found[-1] if upper else found[0]
+
+    z1 = zone_of(from_floor, up)
+    z2 = zone_of(to_floor, not up)
+    if z1 == z2:
+        return [(z1, from_floor, to_floor)]
+    legs = []
+    f = from_floor
+    step = 1 if z2 > z1 else -1
+    for z in range(z1, z2, step):
+        lobby = zones[z].highest if step > 0 else zones[z].lowest
+        legs.append((z, f, lobby))
+        f = lobby
+    legs.append((z2, f, to_floor))
+    return legs
+
+class ZoneSim:
+    '''一个分区的增量模拟，可以在工作进程或主进程中运行'''
+    def __init__(self, topology: Topology, zone: Zone, transfer_time: float):
+        from src.elevator import Building, Elevator, Floor
+
+        self.zone = zone
+        self.transfer_time = transfer_time
+        b = self.building = Building(
+            floor_range=(Floor(zone.lowest), Floor(zone.highest)),
+            start_time=topology.start_time,
+            bid=topology.bid,
+            name=f'{topology.name}-{zone.name}',
+            normal_height=topology.normal_height
+        )
+        for fid, h in zip(topology.fids, topology.heights):
+            if fid in b.floor_range and h != topology.normal_height:
+                b.floor_range[fid] = h
+        b.elevators = tuple(
+            Elevator(eid=c.eid, name=c.name, max_weight=c.max_weight, building=b,
+                     speed=c.speed, height=c.height, idle_time=c.idle_time,
+                     max_persons=c.max_persons, floor_area=c.floor_area)
+            for c in topology.cars if c.eid in zone.eids
+        )
+        if topology.capacity is not None:
+            from src.capacity import CapacityModel
+            b.capacity = CapacityModel(**topology.capacity._asdict())
+        assert b.elevators, f"分区{zone.name}没有电梯"
+        b.reset_cars()
+        self.events = b.elevator_initpark()
+        self.rest: Dict[int, tuple] = {}  # 乘客下标 -> 后续行程
+        self.heap: list = []
+
+    def add(self, leg: Leg):
+        pid, appear, from_floor, to_floor, weight, rest = leg
+        store = self.building.passenger_store
+        i = store.add(pid, from_floor, to_floor, appear, weight)
+        if rest:
+            self.rest[i] = rest
+        heapq.heappush(self.heap, (appear, i))
+
+    def advance(self, until: float, legs: Sequence[Leg]) -> tuple[List[Leg], Optional[float]]:
+        '''处理出现时间早于 `until` 的乘客，返回(换乘消息, 下一位待处理乘客的出现时间)'''
+        for leg in legs:
+            self.add(leg)
+        b = self.building
+        store = b.passenger_store
+        emit = b.eventman.emit
+        transfers = []
+        while self.heap and self.heap[0][0] < until:
+            appear, i = heapq.heappop(self.heap)
+            from_floor, to_floor, weight = store.from_floor[i], store.to_floor[i], store.weight[i]
+            # ETA最小、载得动的电梯；run_trip会等它跑完已派的行程、避开停运再出发
+            k = next((k for _, k in b.fastest_cars(from_floor, int(appear)) if b.car_load[k].fits(weight)), None)
+            if k is None:
+                emit(self.events, 'call_elevator', int(appear), passenger=i, floor=b.floor_range[from_floor])
+                emit(self.events, 'elevator_outweight', int(appear), b.elevators[0], i)
+                store.status[i] = REJECTED
+                continue
+            elevator = b.elevators[k]
+            store.call_eid[i] = elevator.eid
+            emit(self.events, 'call_elevator', int(appear), elevator, i, b.floor_range[from_floor])
+            b.car_load[k].add(weight)
+            self.events.extend(b.run_trip(k, from_floor, ((to_floor, (i,)),)))
+            rest = self.rest.pop(i, None)
+            if rest and store.status[i] == DONE:
+                # 下梯后步行到另一组电梯，至少晚transfer_time秒出现
+                t = Tool.add_seconds(int(max(store.alight_time[i], appear)), self.transfer_time)
+                transfers.append((store.pid[i], t, rest[0][1], rest[0][2], store.weight[i], rest))
+        return transfers, (self.heap[0][0] if self.heap else None)
+
+    def finish(self) -> List[ZoneEvent]:
+        b = self.building
+        b.sync_cars()
+        name = self.zone.name
+        out = [ZoneEvent(e['relative_time'], name, e['event_type'],
+                         e['elevator'].eid if e['elevator'] is not None else None,
+                         e['passenger'].pid if e['passenger'] is not None else None,
+                         e['floor'].fid if e['floor'] is not None else None)
+               for e in self.events]
+        out.sort(key=lambda e: e.relative_time)
+        return out
+
+def _worker(conn, topology: Topology, zone: Zone, transfer_time: float, legs: List[Leg]):
+    sim = ZoneSim(topology, zone, transfer_time)
+    for leg in legs:
+        sim.add(leg)
+    conn.send(sim.heap[0][0] if sim.heap else None)
+    while True:
+        cmd, args = conn.recv()
+        if cmd == 'advance':
+            conn.send(sim.advance(*args))
+        else:
+            conn.send(sim.finish())
+            break
+    conn.close()
+
+class _Local:
+    '''不开进程时与工作进程相同的接口'''
+    def __init__(self, topology, zone, transfer_time, legs):
+        self.sim = ZoneSim(topology, zone, transfer_time)
+        for leg in legs:
+            self.sim.add(leg)
+        self._reply = self.sim.heap[0][0] if self.sim.heap else None
+
+    def send(self, msg):
+        cmd, args = msg
+        self._reply = self.sim.advance(*args) if cmd == 'advance' else self.sim.finish()
+
+    def recv(self):
+        return self._reply
+
+def run_zoned(topology: Topology,
+              zones: Sequence[Zone],
+              transfer_time: float = 30,
+              processes: bool = True
+              ) -> List[ZoneEvent]:
+    '''分区并行模拟整栋楼，返回按时间归并的事件记录'''
+    assert transfer_time > 0, "换乘时间必须大于0（它是保守同步的前瞻量）"
+    offsets: Dict[str, float] = {}  # 出现时间字符串大量重复，解析结果缓存起来
+    initial: List[List[Leg]] = [[] for _ in zones]
+    for p in topology.passengers:
+        legs = plan_legs(zones, p.from_floor, p.to_floor)
+        z, f, t = legs[0]
+        appear = offsets.get(p.appear_time)
+        if appear is None:
+            appear = offsets[p.appear_time] = Tool.time_difference_seconds(topology.start_time, p.appear_time)
+        initial[z].append((p.pid, appear, f, t, p.weight, tuple(legs[1:])))
+
+    # 发给工作进程的拓扑不带乘客，乘客按分区单独发送
+    bare = Topology(topology.name, topology.bid, topology.start_time, topology.normal_height,
+                    topology.fids, topology.heights, topology.cars, (), topology.strategy, topology.digest,
+                    topology.capacity)
+    workers, procs = [], []
+    for zone, legs in zip(zones, initial):
+        if processes:
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_worker, args=(child, bare, zone, transfer_time, legs), daemon=True)
+            proc.start()
+            workers.append(parent)
+            procs.append(proc)
+        else:
+            workers.append(_Local(bare, zone, transfer_time, legs))
+    next_time: List[Optional[float]] = [w.recv() for w in workers]
+    pending: List[List[Leg]] = [[] for _ in zones]
+
+    try:
+        while True:
+            times = [t for t in next_time if t is not None]
+            times += [leg[1] for legs in pending for leg in legs]
+            if not times:
+                break
+            until = min(times) + transfer_time
+            active = [z for z in range(len(zones))
+                      if pending[z] or (next_time[z] is not None and next_time[z] < until)]
+            for z in active:  # 先全部发出，各分区并行处理
+                workers[z].send(('advance', (until, pending[z])))
+                pending[z] = []
+            for z in active:
+                transfers, next_time[z] = workers[z].recv()
+                for pid, t, f, to, w, rest in transfers:
+                    nz = rest[0][0]
+                    pending[nz].append((pid, t, f, to, w, rest[1:]))
+
+        for w in workers:
+            w.send(('finish', None))
+        results = [w.recv() for w in workers]
+    finally:
+        for proc in procs:
+            proc.join(timeout=5)
+    return list(heapq.merge(*results, key=lambda e: e.relative_time))
@@ -1,5 +1,14 @@
-from src.utils import data_revert as dr
-import os
+import sys
 
-print("欢迎来到WorldOnline!")
-print("")
\ No newline at end of file
+def main(argv: list[str] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if '--startup-time' in argv:
+        # 按需导入，普通启动不付出测量模块的开销
+        from src.utils.startup import report_cold_start
+        return 0 if report_cold_start() else 1
+    print("欢迎来到WorldOnline!")
+    print("")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())